@@ -9,6 +9,7 @@ from .tags import router as tags_router
 from .notes import router as notes_router
 from .activity import router as activity_router
 from .reports import router as reports_router
+from .sources import router as sources_router
 
 api_router = APIRouter(prefix="/api")
 
@@ -21,4 +22,5 @@ api_router.include_router(leads_router, prefix="/leads", tags=["Leads"])
 api_router.include_router(tags_router, prefix="/lead-tags", tags=["Lead Tags"])
 api_router.include_router(notes_router, prefix="/lead-notes", tags=["Lead Notes"])
 api_router.include_router(activity_router, prefix="/activity-logs", tags=["Activity Logs"])
-api_router.include_router(reports_router, prefix="/reports", tags=["Reports"])
\ No newline at end of file
+api_router.include_router(reports_router, prefix="/reports", tags=["Reports"])
+api_router.include_router(sources_router, prefix="/lead-sources", tags=["Lead Sources"])
\ No newline at end of file
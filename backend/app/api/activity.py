@@ -1,18 +1,20 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.activity import ActivityLog
 from app.models.user import User
-from app.schemas.activity import ActivityLogResponse
+from app.schemas.activity import ActivityLogResponse, ActivityLogPage
 from app.auth import require_admin, get_current_user
+from app.pagination import keyset_paginate
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ActivityLogResponse])
-async def get_activity_logs(
+@router.get("/", response_model=Union[List[ActivityLogResponse], ActivityLogPage])
+def get_activity_logs(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     activity_type: Optional[str] = Query(None, description="Filter by activity type"),
     current_user: User = Depends(get_current_user),
@@ -31,11 +33,19 @@ async def get_activity_logs(
     if activity_type:
         query = query.filter(ActivityLog.activity_type == activity_type)
     
-    logs = query.order_by(ActivityLog.created_at.desc()).offset(skip).limit(limit).all()
+    columns = [ActivityLog.created_at, ActivityLog.id]
+    if cursor is not None:
+        logs, next_cursor = keyset_paginate(query, columns, cursor, limit)
+        return ActivityLogPage(
+            items=[ActivityLogResponse.from_orm(log) for log in logs],
+            next_cursor=next_cursor
+        )
+    
+    logs = query.order_by(*[column.desc() for column in columns]).offset(skip).limit(limit).all()
     return [ActivityLogResponse.from_orm(log) for log in logs]
 
 @router.get("/recent", response_model=List[ActivityLogResponse])
-async def get_recent_activity(
+def get_recent_activity(
     limit: int = Query(10, description="Number of recent activities to return"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
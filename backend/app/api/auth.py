@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserLogin, UserResponse
-from app.auth import verify_password, create_access_token, get_current_user
+from app.auth import password_hasher, create_access_token, get_current_user
 from app.services.activity_logger import ActivityLogger
 from app.config import settings
 
@@ -13,7 +13,7 @@ router = APIRouter()
 security = HTTPBearer()
 
 @router.post("/login")
-async def login(
+def login(
     user_credentials: UserLogin,
     request: Request,
     db: Session = Depends(get_db)
@@ -25,12 +25,24 @@ async def login(
         User.is_active == True
     ).first()
     
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    verified, new_hash = password_hasher.verify_and_update(user_credentials.password, user.password_hash)
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+    
+    # Upgrade hashes made with a different bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -47,7 +59,7 @@ async def login(
     }
 
 @router.post("/logout")
-async def logout(
+def logout(
     request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -59,6 +71,6 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
     return UserResponse.from_orm(current_user)
\ No newline at end of file
@@ -1,31 +1,59 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks, Query
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.models.campaign import Campaign
 from app.models.product import Product
 from app.models.region import Region
 from app.models.user import User
-from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignResponse
+from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignPage
 from app.auth import require_sales_or_admin, get_current_user
+from app.pagination import keyset_paginate
+from app.fields import parse_fields, loader_options, sparse_response
 from app.services.activity_logger import ActivityLogger
 from app.services.lead_generation import LeadGenerationService
+from app.services.lead_writer import StreamingLeadWriter
+from app.services.deadline import Deadline
+from app.config import settings
 
 router = APIRouter()
 
-@router.get("/", response_model=List[CampaignResponse])
-async def get_campaigns(
+# Relationships serialized by CampaignResponse
+CAMPAIGN_LOADERS = {
+    "product": joinedload(Campaign.product),
+    "region": joinedload(Campaign.region),
+}
+
+@router.get("/", response_model=Union[List[CampaignResponse], CampaignPage])
+def get_campaigns(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; columns not listed are not loaded"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all campaigns"""
-    campaigns = db.query(Campaign).offset(skip).limit(limit).all()
+    columns = [Campaign.created_at, Campaign.id]
+    selected_fields = parse_fields(fields, CampaignResponse)
+    query = db.query(Campaign).options(*loader_options(Campaign, selected_fields, CAMPAIGN_LOADERS, columns))
+    
+    if cursor is not None:
+        campaigns, next_cursor = keyset_paginate(query, columns, cursor, limit)
+        if selected_fields:
+            return sparse_response(campaigns, selected_fields, CampaignResponse, paged=True, next_cursor=next_cursor)
+        return CampaignPage(
+            items=[CampaignResponse.from_orm(campaign) for campaign in campaigns],
+            next_cursor=next_cursor
+        )
+    
+    campaigns = query.order_by(*[column.desc() for column in columns]).offset(skip).limit(limit).all()
+    if selected_fields:
+        return sparse_response(campaigns, selected_fields, CampaignResponse)
     return [CampaignResponse.from_orm(campaign) for campaign in campaigns]
 
 @router.post("/", response_model=CampaignResponse)
-async def create_campaign(
+def create_campaign(
     campaign_data: CampaignCreate,
     request: Request,
     current_user: User = Depends(require_sales_or_admin),
@@ -59,6 +87,7 @@ async def create_campaign(
         scheduled_at=campaign_data.scheduled_at,
         is_recurring=campaign_data.is_recurring,
         recurrence_pattern=campaign_data.recurrence_pattern,
+        run_timeout_seconds=campaign_data.run_timeout_seconds,
         created_by=current_user.id
     )
     
@@ -74,13 +103,13 @@ async def create_campaign(
     return CampaignResponse.from_orm(db_campaign)
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
-async def get_campaign(
+def get_campaign(
     campaign_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get campaign by ID"""
-    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    campaign = db.query(Campaign).options(*CAMPAIGN_LOADERS.values()).filter(Campaign.id == campaign_id).first()
     if not campaign:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,7 +119,7 @@ async def get_campaign(
     return CampaignResponse.from_orm(campaign)
 
 @router.put("/{campaign_id}", response_model=CampaignResponse)
-async def update_campaign(
+def update_campaign(
     campaign_id: str,
     campaign_update: CampaignUpdate,
     request: Request,
@@ -114,6 +143,10 @@ async def update_campaign(
             changes[field] = {"old": getattr(campaign, field), "new": value}
             setattr(campaign, field, value)
     
+    # A rescheduled campaign must be claimed again by the scheduler
+    if "scheduled_at" in changes:
+        campaign.dispatched_at = None
+    
     if changes:
         db.commit()
         db.refresh(campaign)
@@ -126,7 +159,7 @@ async def update_campaign(
     return CampaignResponse.from_orm(campaign)
 
 @router.post("/{campaign_id}/run")
-async def run_campaign(
+def run_campaign(
     campaign_id: str,
     background_tasks: BackgroundTasks,
     request: Request,
@@ -156,10 +189,8 @@ async def run_campaign(
     
     return {"message": "Campaign started successfully"}
 
-async def generate_leads_for_campaign(campaign_id: str, db: Session):
+def generate_leads_for_campaign(campaign_id: str, db: Session):
     """Background task to generate leads for a campaign"""
-    from app.models.lead import AutoLead
-    
     try:
         campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
         if not campaign:
@@ -168,33 +199,18 @@ async def generate_leads_for_campaign(campaign_id: str, db: Session):
         # Initialize lead generation service
         lead_service = LeadGenerationService()
         
-        # Generate leads
+        # Persist leads in small batches as they are scored
         region_name = campaign.region.name if campaign.region else "India"
-        generated_leads = lead_service.generate_leads(
+        deadline = Deadline(campaign.run_timeout_seconds or settings.campaign_run_timeout_seconds)
+        writer = StreamingLeadWriter(db, campaign.id)
+        for lead_data in lead_service.generate_leads_stream(
             keywords=campaign.keywords,
             region=region_name,
-            limit=20
-        )
+            deadline=deadline
+        ):
+            writer.add(lead_data)
         
-        # Save leads to database
-        saved_count = 0
-        for lead_data in generated_leads:
-            auto_lead = AutoLead(
-                campaign_id=campaign.id,
-                company_name=lead_data.get('company_name', ''),
-                website=lead_data.get('website'),
-                email=lead_data.get('email'),
-                phone=lead_data.get('phone'),
-                address=lead_data.get('address'),
-                industry=lead_data.get('industry'),
-                keywords_matched=lead_data.get('keywords_matched', []),
-                relevance_score=lead_data.get('relevance_score', 0.0),
-                source=lead_data.get('source', 'unknown'),
-                raw_data=lead_data.get('raw_data')
-            )
-            
-            db.add(auto_lead)
-            saved_count += 1
+        saved_count = writer.finalize(settings.campaign_lead_limit)
         
         # Update campaign
         campaign.leads_generated = saved_count
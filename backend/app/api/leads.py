@@ -1,51 +1,97 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
-from app.models.lead import AutoLead, FinalLead, LeadStatus
+from app.models.lead import AutoLead, FinalLead
 from app.models.user import User
+from app.models.export_job import ExportJob, ExportStatus
 from app.schemas.lead import (
-    AutoLeadCreate, AutoLeadResponse, 
-    FinalLeadCreate, FinalLeadResponse, FinalLeadUpdate
+    AutoLeadCreate, AutoLeadResponse, AutoLeadPage,
+    FinalLeadCreate, FinalLeadResponse, FinalLeadUpdate, FinalLeadPage,
+    FinalLeadBulkUpdate, FinalLeadBulkResult
 )
 from app.auth import require_reviewer_or_above, get_current_user
+from app.pagination import keyset_paginate
+from app.fields import parse_fields, loader_options, sparse_response
+from app.search import apply_lead_filters
+from app.services.lead_export import export_columns, export_query, csv_formatters, EXPORT_FILE_EXTENSIONS, EXPORT_MEDIA_TYPES
 from app.services.activity_logger import ActivityLogger
-import pandas as pd
+from app.services.lead_bulk import LeadBulkService
+from app.services.lead_rollup import LeadRollupService
+from app.schemas.export import ExportJobCreate, ExportJobResponse
+from app.tasks import run_lead_export
+from fastapi.responses import StreamingResponse, FileResponse
 from io import StringIO
+from contextlib import nullcontext
+import csv
+import os
 
 router = APIRouter()
 
+def _sort_columns(model, order_by: str):
+    """Keyset sort columns for lead listings, newest or most relevant first"""
+    if order_by == "created_at":
+        return [model.created_at, model.id]
+    if order_by == "relevance":
+        return [model.relevance_score, model.id]
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="order_by must be 'created_at' or 'relevance'"
+    )
+
 # Auto Leads endpoints
-@router.get("/auto", response_model=List[AutoLeadResponse])
-async def get_auto_leads(
+@router.get("/auto", response_model=Union[List[AutoLeadResponse], AutoLeadPage])
+def get_auto_leads(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
+    order_by: str = Query("created_at", description="Sort order: created_at or relevance"),
+    campaign_id: Optional[str] = Query(None, description="Filter by campaign"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search in company name, email, industry"),
+    search_mode: str = Query("boolean", description="Full-text mode on MySQL: boolean or natural"),
+    tags: Optional[List[str]] = Query(None, description="Tag ids the lead must have all of"),
+    tags_any: Optional[List[str]] = Query(None, description="Tag ids the lead must have at least one of"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; columns not listed are not loaded"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get auto-generated leads"""
-    query = db.query(AutoLead)
-    
-    if status_filter:
-        query = query.filter(AutoLead.status == status_filter)
-    
-    if search:
-        query = query.filter(
-            or_(
-                AutoLead.company_name.contains(search),
-                AutoLead.email.contains(search),
-                AutoLead.industry.contains(search)
-            )
+    columns = _sort_columns(AutoLead, order_by)
+    selected_fields = parse_fields(fields, AutoLeadResponse)
+    query = db.query(AutoLead).options(*loader_options(AutoLead, selected_fields, {}, columns))
+    query, search_score = apply_lead_filters(
+        db, query, AutoLead,
+        status_filter=status_filter,
+        campaign_id=campaign_id,
+        search=search,
+        search_mode=search_mode,
+        tags=tags,
+        tags_any=tags_any
+    )
+    
+    if cursor is not None:
+        leads, next_cursor = keyset_paginate(query, columns, cursor, limit)
+        if selected_fields:
+            return sparse_response(leads, selected_fields, AutoLeadResponse, paged=True, next_cursor=next_cursor)
+        return AutoLeadPage(
+            items=[AutoLeadResponse.from_orm(lead) for lead in leads],
+            next_cursor=next_cursor
         )
     
+    # Offset pages of a full-text search are ranked by relevance
+    if search_score is not None:
+        query = query.order_by(search_score.desc(), AutoLead.id.desc())
+    else:
+        query = query.order_by(*[column.desc() for column in columns])
+    
     leads = query.offset(skip).limit(limit).all()
+    if selected_fields:
+        return sparse_response(leads, selected_fields, AutoLeadResponse)
     return [AutoLeadResponse.from_orm(lead) for lead in leads]
 
 @router.post("/auto", response_model=AutoLeadResponse)
-async def create_auto_lead(
+def create_auto_lead(
     lead_data: AutoLeadCreate,
     request: Request,
     current_user: User = Depends(require_reviewer_or_above),
@@ -55,6 +101,8 @@ async def create_auto_lead(
     db_lead = AutoLead(**lead_data.dict())
     
     db.add(db_lead)
+    db.flush()
+    LeadRollupService.record_added(db, "auto", AutoLead.id == db_lead.id)
     db.commit()
     db.refresh(db_lead)
     
@@ -66,90 +114,84 @@ async def create_auto_lead(
     return AutoLeadResponse.from_orm(db_lead)
 
 @router.put("/auto/{lead_id}/finalize")
-async def finalize_auto_leads(
+def finalize_auto_leads(
     lead_ids: List[str],
     request: Request,
     current_user: User = Depends(require_reviewer_or_above),
     db: Session = Depends(get_db)
 ):
     """Move auto leads to final leads"""
-    finalized_count = 0
-    
-    for lead_id in lead_ids:
-        auto_lead = db.query(AutoLead).filter(AutoLead.id == lead_id).first()
-        if not auto_lead:
-            continue
-        
-        # Create final lead from auto lead
-        final_lead = FinalLead(
-            auto_lead_id=auto_lead.id,
-            company_name=auto_lead.company_name,
-            website=auto_lead.website,
-            linkedin_url=auto_lead.linkedin_url,
-            email=auto_lead.email,
-            phone=auto_lead.phone,
-            address=auto_lead.address,
-            industry=auto_lead.industry,
-            employee_count=auto_lead.employee_count,
-            revenue_range=auto_lead.revenue_range,
-            keywords_matched=auto_lead.keywords_matched,
-            relevance_score=auto_lead.relevance_score,
-            approved_by=current_user.id
-        )
-        
-        db.add(final_lead)
-        
-        # Update auto lead status
-        auto_lead.status = LeadStatus.APPROVED
-        auto_lead.is_selected = True
-        
-        finalized_count += 1
-    
-    db.commit()
+    finalized_ids = LeadBulkService.finalize_auto_leads(db, lead_ids, current_user.id)
+    finalized_count = len(finalized_ids)
     
     # Log activity
     ActivityLogger.log_activity(
         db, current_user, "finalize_leads", 
         f"Finalized {finalized_count} auto leads to final leads",
+        entity_type="auto_lead",
+        metadata={"lead_ids": finalized_ids, "skipped_count": len(set(lead_ids)) - finalized_count},
         request=request
     )
     
-    return {"message": f"Successfully finalized {finalized_count} leads"}
+    return {
+        "message": f"Successfully finalized {finalized_count} leads",
+        "finalized_count": finalized_count
+    }
 
 # Final Leads endpoints
-@router.get("/final", response_model=List[FinalLeadResponse])
-async def get_final_leads(
+@router.get("/final", response_model=Union[List[FinalLeadResponse], FinalLeadPage])
+def get_final_leads(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
+    order_by: str = Query("created_at", description="Sort order: created_at or relevance"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
     assigned_to: Optional[str] = Query(None, description="Filter by assigned user"),
     search: Optional[str] = Query(None, description="Search in company name, email, industry"),
+    search_mode: str = Query("boolean", description="Full-text mode on MySQL: boolean or natural"),
+    tags: Optional[List[str]] = Query(None, description="Tag ids the lead must have all of"),
+    tags_any: Optional[List[str]] = Query(None, description="Tag ids the lead must have at least one of"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; columns not listed are not loaded"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get final leads"""
-    query = db.query(FinalLead)
-    
-    if status_filter:
-        query = query.filter(FinalLead.status == status_filter)
-    
-    if assigned_to:
-        query = query.filter(FinalLead.assigned_to == assigned_to)
+    columns = _sort_columns(FinalLead, order_by)
+    selected_fields = parse_fields(fields, FinalLeadResponse)
+    loaders = {"assigned_user": joinedload(FinalLead.assigned_user)}
+    query = db.query(FinalLead).options(*loader_options(FinalLead, selected_fields, loaders, columns))
+    query, search_score = apply_lead_filters(
+        db, query, FinalLead,
+        status_filter=status_filter,
+        assigned_to=assigned_to,
+        search=search,
+        search_mode=search_mode,
+        tags=tags,
+        tags_any=tags_any
+    )
     
-    if search:
-        query = query.filter(
-            or_(
-                FinalLead.company_name.contains(search),
-                FinalLead.email.contains(search),
-                FinalLead.industry.contains(search)
-            )
+    if cursor is not None:
+        leads, next_cursor = keyset_paginate(query, columns, cursor, limit)
+        if selected_fields:
+            return sparse_response(leads, selected_fields, FinalLeadResponse, paged=True, next_cursor=next_cursor)
+        return FinalLeadPage(
+            items=[FinalLeadResponse.from_orm(lead) for lead in leads],
+            next_cursor=next_cursor
         )
     
+    # Offset pages of a full-text search are ranked by relevance
+    if search_score is not None:
+        query = query.order_by(search_score.desc(), FinalLead.id.desc())
+    else:
+        query = query.order_by(*[column.desc() for column in columns])
+    
     leads = query.offset(skip).limit(limit).all()
+    if selected_fields:
+        return sparse_response(leads, selected_fields, FinalLeadResponse)
     return [FinalLeadResponse.from_orm(lead) for lead in leads]
 
 @router.post("/final", response_model=FinalLeadResponse)
-async def create_final_lead(
+def create_final_lead(
     lead_data: FinalLeadCreate,
     request: Request,
     current_user: User = Depends(require_reviewer_or_above),
@@ -159,6 +201,8 @@ async def create_final_lead(
     db_lead = FinalLead(**lead_data.dict())
     
     db.add(db_lead)
+    db.flush()
+    LeadRollupService.record_added(db, "final", FinalLead.id == db_lead.id)
     db.commit()
     db.refresh(db_lead)
     
@@ -169,8 +213,53 @@ async def create_final_lead(
     
     return FinalLeadResponse.from_orm(db_lead)
 
+@router.patch("/final/bulk", response_model=FinalLeadBulkResult)
+def bulk_update_final_leads(
+    bulk_update: FinalLeadBulkUpdate,
+    request: Request,
+    current_user: User = Depends(require_reviewer_or_above),
+    db: Session = Depends(get_db)
+):
+    """Apply the same updates to final leads selected by id or by filter"""
+    updates = bulk_update.updates.dict(exclude_unset=True)
+    if not updates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No updates provided"
+        )
+    
+    filters = bulk_update.filters.dict(exclude_defaults=True) if bulk_update.filters else {}
+    if bulk_update.lead_ids is not None:
+        lead_ids = bulk_update.lead_ids
+    elif set(filters) - {"search_mode"}:
+        query, _ = apply_lead_filters(db, db.query(FinalLead.id), FinalLead, **filters)
+        lead_ids = [lead_id for (lead_id,) in query]
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide lead_ids or at least one filter"
+        )
+    
+    updated_ids, changes = LeadBulkService.update_final_leads(db, lead_ids, updates)
+    
+    # Log activity
+    if updated_ids:
+        ActivityLogger.log_activity(
+            db, current_user, "bulk_update",
+            f"User {current_user.full_name} updated {len(updated_ids)} final leads",
+            entity_type="final_lead",
+            metadata={"lead_ids": updated_ids, "filters": filters or None, "changes": changes},
+            request=request
+        )
+    
+    return FinalLeadBulkResult(
+        matched_count=len(set(lead_ids)),
+        updated_count=len(updated_ids),
+        changes=changes
+    )
+
 @router.put("/final/{lead_id}", response_model=FinalLeadResponse)
-async def update_final_lead(
+def update_final_lead(
     lead_id: str,
     lead_update: FinalLeadUpdate,
     request: Request,
@@ -189,10 +278,12 @@ async def update_final_lead(
     changes = {}
     update_data = lead_update.dict(exclude_unset=True)
     
-    for field, value in update_data.items():
-        if hasattr(lead, field) and getattr(lead, field) != value:
-            changes[field] = {"old": getattr(lead, field), "new": value}
-            setattr(lead, field, value)
+    rollup = LeadRollupService.tracking(db, "final", FinalLead.id == lead.id) if "status" in update_data else nullcontext()
+    with rollup:
+        for field, value in update_data.items():
+            if hasattr(lead, field) and getattr(lead, field) != value:
+                changes[field] = {"old": getattr(lead, field), "new": value}
+                setattr(lead, field, value)
     
     if changes:
         db.commit()
@@ -206,7 +297,7 @@ async def update_final_lead(
     return FinalLeadResponse.from_orm(lead)
 
 @router.delete("/final/{lead_id}")
-async def delete_final_lead(
+def delete_final_lead(
     lead_id: str,
     request: Request,
     current_user: User = Depends(require_reviewer_or_above),
@@ -221,6 +312,7 @@ async def delete_final_lead(
         )
     
     company_name = lead.company_name
+    LeadRollupService.record_removed(db, "final", FinalLead.id == lead.id)
     db.delete(lead)
     db.commit()
     
@@ -231,64 +323,132 @@ async def delete_final_lead(
     
     return {"message": "Lead deleted successfully"}
 
+EXPORT_BATCH_SIZE = 1000
+
 @router.get("/export")
-async def export_leads(
+def export_leads(
     lead_type: str = Query("final", description="Type of leads to export: auto or final"),
     format: str = Query("csv", description="Export format: csv"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Export leads to CSV"""
-    if lead_type == "auto":
-        leads = db.query(AutoLead).all()
-        data = []
-        for lead in leads:
-            data.append({
-                'Company Name': lead.company_name,
-                'Website': lead.website or '',
-                'Email': lead.email or '',
-                'Phone': lead.phone or '',
-                'Industry': lead.industry or '',
-                'Employee Count': lead.employee_count or '',
-                'Relevance Score': float(lead.relevance_score),
-                'Status': lead.status.value,
-                'Source': lead.source or '',
-                'Created Date': lead.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-    else:
-        leads = db.query(FinalLead).all()
-        data = []
-        for lead in leads:
-            data.append({
-                'Company Name': lead.company_name,
-                'Website': lead.website or '',
-                'Email': lead.email or '',
-                'Phone': lead.phone or '',
-                'Industry': lead.industry or '',
-                'Employee Count': lead.employee_count or '',
-                'Priority': lead.priority.value,
-                'Status': lead.status.value,
-                'Relevance Score': float(lead.relevance_score),
-                'Assigned To': lead.assigned_user.full_name if lead.assigned_user else '',
-                'Last Contact': lead.last_contact_date.strftime('%Y-%m-%d') if lead.last_contact_date else '',
-                'Next Follow Up': lead.next_follow_up.strftime('%Y-%m-%d') if lead.next_follow_up else '',
-                'Approved Date': lead.approved_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-    
-    # Create CSV
-    df = pd.DataFrame(data)
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_content = csv_buffer.getvalue()
-    
-    # Log export activity
-    ActivityLogger.log_export(
-        db, current_user, f"{lead_type}_leads", len(data)
+    headers = [header for header, _, _ in export_columns(lead_type)]
+    formatters = csv_formatters(lead_type)
+    
+    # Server-side cursor, fetched in batches so memory stays flat
+    query = export_query(db, lead_type).execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH_SIZE
     )
     
-    # Return CSV response
-    return Response(
-        content=csv_content,
+    def generate_csv():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        
+        # Send the header straight away so the download starts immediately
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        
+        record_count = 0
+        for row in query:
+            writer.writerow([formatter(value) for formatter, value in zip(formatters, row)])
+            record_count += 1
+            if record_count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        
+        # Log export activity once the row count is known
+        ActivityLogger.log_export(
+            db, current_user, f"{lead_type}_leads", record_count
+        )
+    
+    return StreamingResponse(
+        generate_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={lead_type}_leads.csv"}
-    )
\ No newline at end of file
+    )
+
+@router.post("/exports", response_model=ExportJobResponse)
+def create_export_job(
+    export_data: ExportJobCreate,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start a background export of leads to a compressed file"""
+    if export_data.lead_type not in ("auto", "final"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lead_type must be 'auto' or 'final'"
+        )
+    
+    job = ExportJob(
+        lead_type=export_data.lead_type,
+        format=export_data.format,
+        filters=export_data.filters.dict(exclude_none=True),
+        created_by=current_user.id
+    )
+    
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    run_lead_export.delay(job.id)
+    
+    # Log activity
+    ActivityLogger.log_activity(
+        db, current_user, "export",
+        f"User {current_user.full_name} started a {job.format.value} export of {job.lead_type} leads",
+        "export_job", job.id, metadata={"filters": job.filters}, request=request
+    )
+    
+    return ExportJobResponse.from_orm(job)
+
+def _get_export_job(db: Session, job_id: str, current_user: User) -> ExportJob:
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    
+    # Users can only see their own exports unless they're admin
+    if current_user.role.value != "admin" and job.created_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return job
+
+@router.get("/exports/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get export job status and progress"""
+    return ExportJobResponse.from_orm(_get_export_job(db, job_id, current_user))
+
+@router.get("/exports/{job_id}/download")
+def download_export(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download a finished export file"""
+    job = _get_export_job(db, job_id, current_user)
+    if job.status != ExportStatus.COMPLETED or not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Export is not ready"
+        )
+    
+    return FileResponse(
+        job.file_path,
+        media_type=EXPORT_MEDIA_TYPES[job.format],
+        filename=f"{job.lead_type}_leads.{EXPORT_FILE_EXTENSIONS[job.format]}"
+    )
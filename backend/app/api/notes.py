@@ -11,7 +11,7 @@ from app.services.activity_logger import ActivityLogger
 router = APIRouter()
 
 @router.get("/", response_model=List[LeadNoteResponse])
-async def get_lead_notes(
+def get_lead_notes(
     lead_id: str = Query(..., description="Lead ID"),
     lead_type: str = Query(..., description="Lead type: auto or final"),
     current_user: User = Depends(get_current_user),
@@ -26,7 +26,7 @@ async def get_lead_notes(
     return [LeadNoteResponse.from_orm(note) for note in notes]
 
 @router.post("/", response_model=LeadNoteResponse)
-async def create_lead_note(
+def create_lead_note(
     note_data: LeadNoteCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -55,7 +55,7 @@ async def create_lead_note(
     return LeadNoteResponse.from_orm(db_note)
 
 @router.delete("/{note_id}")
-async def delete_lead_note(
+def delete_lead_note(
     note_id: str,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -11,7 +11,7 @@ from app.services.activity_logger import ActivityLogger
 router = APIRouter()
 
 @router.get("/", response_model=List[ProductResponse])
-async def get_products(
+def get_products(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = Query(None, description="Search products by name or keywords"),
@@ -28,7 +28,7 @@ async def get_products(
     return [ProductResponse.from_orm(product) for product in products]
 
 @router.post("/", response_model=ProductResponse)
-async def create_product(
+def create_product(
     product_data: ProductCreate,
     request: Request,
     current_user: User = Depends(require_admin),
@@ -54,7 +54,7 @@ async def create_product(
     return ProductResponse.from_orm(db_product)
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
+def get_product(
     product_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -74,7 +74,7 @@ async def get_product(
     return ProductResponse.from_orm(product)
 
 @router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(
+def update_product(
     product_id: str,
     product_update: ProductUpdate,
     request: Request,
@@ -114,7 +114,7 @@ async def update_product(
     return ProductResponse.from_orm(product)
 
 @router.delete("/{product_id}")
-async def delete_product(
+def delete_product(
     product_id: str,
     request: Request,
     current_user: User = Depends(require_admin),
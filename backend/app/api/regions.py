@@ -10,7 +10,7 @@ from app.auth import get_current_user
 router = APIRouter()
 
 @router.get("/", response_model=List[RegionResponse])
-async def get_regions(
+def get_regions(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
@@ -1,167 +1,223 @@
-from typing import Dict, Any, List
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from app.database import get_db
-from app.models.lead import AutoLead, FinalLead
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models.lead import LeadStatus
+from app.models.report import LeadDailyCount
 from app.models.campaign import Campaign
 from app.models.region import Region
 from app.models.product import Product
 from app.models.user import User
 from app.auth import get_current_user
+from app.report_cache import report_cache, LEADS, CAMPAIGNS
 
 router = APIRouter()
 
+# Shared by all dashboard requests, which bounds the extra DB connections they use
+_query_executor = ThreadPoolExecutor(max_workers=settings.report_query_workers, thread_name_prefix="report-query")
+
+# Every report reads lead counts from the lead_daily_counts rollup, so its
+# cost depends on the number of days, campaigns and sources, not on leads.
+# Responses are cached until a lead or campaign write changes them.
+
+def _lead_counts_by_status(db: Session) -> Dict[str, Dict[LeadStatus, int]]:
+    """Current lead counts per lead type and status"""
+    lead_count = func.sum(LeadDailyCount.lead_count)
+    rows = db.query(
+        LeadDailyCount.lead_type, LeadDailyCount.status, lead_count
+    ).group_by(
+        LeadDailyCount.lead_type, LeadDailyCount.status
+    ).having(lead_count > 0).all()
+    
+    counts = {"auto": {}, "final": {}}
+    for lead_type, lead_status, count in rows:
+        counts[lead_type][lead_status] = int(count)
+    return counts
+
+def _auto_lead_counts_by(db: Session, column) -> List[Any]:
+    """Top 10 values of a campaign column (region or product name) by auto lead count"""
+    lead_count = func.sum(LeadDailyCount.lead_count).label('lead_count')
+    return db.query(
+        column, lead_count
+    ).select_from(
+        LeadDailyCount
+    ).join(
+        Campaign, Campaign.id == LeadDailyCount.campaign_id
+    ).join(
+        column.class_
+    ).filter(
+        LeadDailyCount.lead_type == "auto"
+    ).group_by(
+        column
+    ).having(
+        lead_count > 0
+    ).order_by(
+        desc('lead_count')
+    ).limit(10).all()
+
+@router.get("/dashboard")
+def get_dashboard(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get every dashboard widget in one response"""
+    return report_cache.get_or_compute("dashboard", {}, (LEADS, CAMPAIGNS), _dashboard)
+
+def _dashboard() -> Dict[str, Any]:
+    # The widgets' queries are independent, so they run side by side
+    counts, active_campaigns, leads_by_region, top_products, campaign_performance = _run_concurrently(
+        _lead_counts_by_status, _active_campaigns, _leads_by_region, _top_products, _campaign_performance
+    )
+    return {
+        "dashboard_stats": _stats_from(counts, active_campaigns),
+        "leads_by_region": leads_by_region,
+        "top_products": top_products,
+        "conversion_funnel": _funnel_from(counts),
+        "campaign_performance": campaign_performance
+    }
+
+def _run_concurrently(*queries: Callable[[Session], Any]) -> List[Any]:
+    """Run each query on its own session on the shared report pool, in order of the results"""
+    futures = [
+        _query_executor.submit(contextvars.copy_context().run, _in_session, query)
+        for query in queries
+    ]
+    return [future.result() for future in futures]
+
+def _in_session(query: Callable[[Session], Any]) -> Any:
+    db = SessionLocal()
+    try:
+        return query(db)
+    finally:
+        db.close()
+
 @router.get("/dashboard-stats")
-async def get_dashboard_stats(
+def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get dashboard statistics"""
-    
-    # Total leads count
-    total_auto_leads = db.query(func.count(AutoLead.id)).scalar() or 0
-    total_final_leads = db.query(func.count(FinalLead.id)).scalar() or 0
-    
-    # Active campaigns
-    active_campaigns = db.query(func.count(Campaign.id)).filter(
+    return report_cache.get_or_compute("dashboard-stats", {}, (LEADS, CAMPAIGNS), lambda: _dashboard_stats(db))
+
+def _dashboard_stats(db: Session) -> Dict[str, Any]:
+    return _stats_from(_lead_counts_by_status(db), _active_campaigns(db))
+
+def _active_campaigns(db: Session) -> int:
+    return db.query(func.count(Campaign.id)).filter(
         Campaign.status == "active"
     ).scalar() or 0
+
+def _stats_from(counts: Dict[str, Dict[LeadStatus, int]], active_campaigns: int) -> Dict[str, Any]:
+    total_auto_leads = sum(counts["auto"].values())
+    total_final_leads = sum(counts["final"].values())
     
     # Conversion rate (final leads / auto leads)
     conversion_rate = (total_final_leads / total_auto_leads * 100) if total_auto_leads > 0 else 0
     
-    # Leads by status
-    auto_leads_by_status = db.query(
-        AutoLead.status, func.count(AutoLead.id)
-    ).group_by(AutoLead.status).all()
-    
-    final_leads_by_status = db.query(
-        FinalLead.status, func.count(FinalLead.id)
-    ).group_by(FinalLead.status).all()
-    
     return {
         "total_leads": total_auto_leads + total_final_leads,
         "auto_leads": total_auto_leads,
         "final_leads": total_final_leads,
         "active_campaigns": active_campaigns,
         "conversion_rate": round(conversion_rate, 2),
-        "auto_leads_by_status": {status.value: count for status, count in auto_leads_by_status},
-        "final_leads_by_status": {status.value: count for status, count in final_leads_by_status}
+        "auto_leads_by_status": {status.value: count for status, count in counts["auto"].items()},
+        "final_leads_by_status": {status.value: count for status, count in counts["final"].items()}
     }
 
 @router.get("/leads-by-region")
-async def get_leads_by_region(
+def get_leads_by_region(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> List[Dict[str, Any]]:
     """Get leads count by region"""
-    
-    results = db.query(
-        Region.name,
-        func.count(AutoLead.id).label('lead_count')
-    ).join(
-        Campaign, Region.id == Campaign.region_id
-    ).join(
-        AutoLead, Campaign.id == AutoLead.campaign_id
-    ).group_by(
-        Region.name
-    ).order_by(
-        desc('lead_count')
-    ).limit(10).all()
+    return report_cache.get_or_compute("leads-by-region", {}, (LEADS, CAMPAIGNS), lambda: _leads_by_region(db))
+
+def _leads_by_region(db: Session) -> List[Dict[str, Any]]:
+    results = _auto_lead_counts_by(db, Region.name)
     
     return [
-        {"region": region, "count": count}
+        {"region": region, "count": int(count)}
         for region, count in results
     ]
 
 @router.get("/top-products")
-async def get_top_products(
+def get_top_products(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> List[Dict[str, Any]]:
     """Get top products by lead generation"""
-    
-    results = db.query(
-        Product.name,
-        func.count(AutoLead.id).label('lead_count')
-    ).join(
-        Campaign, Product.id == Campaign.product_id
-    ).join(
-        AutoLead, Campaign.id == AutoLead.campaign_id
-    ).group_by(
-        Product.name
-    ).order_by(
-        desc('lead_count')
-    ).limit(10).all()
+    return report_cache.get_or_compute("top-products", {}, (LEADS, CAMPAIGNS), lambda: _top_products(db))
+
+def _top_products(db: Session) -> List[Dict[str, Any]]:
+    results = _auto_lead_counts_by(db, Product.name)
     
     return [
-        {"product": product, "count": count}
+        {"product": product, "count": int(count)}
         for product, count in results
     ]
 
 @router.get("/conversion-funnel")
-async def get_conversion_funnel(
+def get_conversion_funnel(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get conversion funnel data"""
-    
+    return report_cache.get_or_compute("conversion-funnel", {}, (LEADS,), lambda: _conversion_funnel(db))
+
+def _conversion_funnel(db: Session) -> Dict[str, Any]:
+    return _funnel_from(_lead_counts_by_status(db))
+
+def _funnel_from(counts: Dict[str, Dict[LeadStatus, int]]) -> Dict[str, Any]:
     # Count leads at each stage
-    generated_leads = db.query(func.count(AutoLead.id)).filter(
-        AutoLead.status == "generated"
-    ).scalar() or 0
-    
-    reviewing_leads = db.query(func.count(AutoLead.id)).filter(
-        AutoLead.status == "reviewing"
-    ).scalar() or 0
-    
-    approved_leads = db.query(func.count(FinalLead.id)).filter(
-        FinalLead.status == "approved"
-    ).scalar() or 0
-    
-    contacted_leads = db.query(func.count(FinalLead.id)).filter(
-        FinalLead.status == "contacted"
-    ).scalar() or 0
-    
     return {
         "stages": [
-            {"name": "Generated", "count": generated_leads},
-            {"name": "Under Review", "count": reviewing_leads},
-            {"name": "Approved", "count": approved_leads},
-            {"name": "Contacted", "count": contacted_leads}
+            {"name": "Generated", "count": counts["auto"].get(LeadStatus.GENERATED, 0)},
+            {"name": "Under Review", "count": counts["auto"].get(LeadStatus.REVIEWING, 0)},
+            {"name": "Approved", "count": counts["final"].get(LeadStatus.APPROVED, 0)},
+            {"name": "Contacted", "count": counts["final"].get(LeadStatus.CONTACTED, 0)}
         ]
     }
 
 @router.get("/campaign-performance")
-async def get_campaign_performance(
+def get_campaign_performance(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> List[Dict[str, Any]]:
     """Get campaign performance metrics"""
+    return report_cache.get_or_compute("campaign-performance", {}, (LEADS, CAMPAIGNS), lambda: _campaign_performance(db))
+
+def _campaign_performance(db: Session) -> List[Dict[str, Any]]:
+    final_counts = db.query(
+        LeadDailyCount.campaign_id,
+        func.sum(LeadDailyCount.lead_count).label('final_leads')
+    ).filter(
+        LeadDailyCount.lead_type == "final"
+    ).group_by(
+        LeadDailyCount.campaign_id
+    ).subquery()
     
     results = db.query(
         Campaign.name,
         Campaign.leads_generated,
-        func.count(FinalLead.id).label('final_leads'),
+        final_counts.c.final_leads,
         Campaign.status
     ).outerjoin(
-        AutoLead, Campaign.id == AutoLead.campaign_id
-    ).outerjoin(
-        FinalLead, AutoLead.id == FinalLead.auto_lead_id
-    ).group_by(
-        Campaign.id, Campaign.name, Campaign.leads_generated, Campaign.status
+        final_counts, Campaign.id == final_counts.c.campaign_id
     ).order_by(
         desc(Campaign.leads_generated)
     ).limit(10).all()
     
-    return [
-        {
+    performance = []
+    for name, leads_generated, final_leads, status in results:
+        final_leads = int(final_leads or 0)
+        performance.append({
             "campaign": name,
             "leads_generated": leads_generated or 0,
-            "final_leads": final_leads or 0,
-            "conversion_rate": round((final_leads / leads_generated * 100) if leads_generated > 0 else 0, 2),
+            "final_leads": final_leads,
+            "conversion_rate": round((final_leads / leads_generated * 100) if leads_generated else 0, 2),
             "status": status.value
-        }
-        for name, leads_generated, final_leads, status in results
-    ]
\ No newline at end of file
+        })
+    return performance
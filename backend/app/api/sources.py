@@ -0,0 +1,44 @@
+from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.user import User
+from app.auth import require_admin
+from app.services.activity_logger import ActivityLogger
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.lead_generation import LeadGenerationService
+
+router = APIRouter()
+
+@router.get("/circuit-breakers")
+def get_circuit_breakers(
+    current_user: User = Depends(require_admin)
+) -> List[Dict[str, Any]]:
+    """Get circuit breaker state for every lead source (Admin only)"""
+    return [CircuitBreaker(source).snapshot() for source in LeadGenerationService.SOURCES]
+
+@router.post("/circuit-breakers/{source}/reset")
+def reset_circuit_breaker(
+    source: str,
+    request: Request,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Force a lead source's circuit breaker closed (Admin only)"""
+    if source not in LeadGenerationService.SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead source not found"
+        )
+    
+    breaker = CircuitBreaker(source)
+    breaker.reset()
+    
+    # Log activity
+    ActivityLogger.log_activity(
+        db, current_user, "reset_circuit_breaker",
+        f"Reset circuit breaker for lead source: {source}",
+        request=request
+    )
+    
+    return breaker.snapshot()
@@ -4,14 +4,18 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.tag import LeadTag, LeadTagAssignment
 from app.models.user import User
-from app.schemas.tag import LeadTagCreate, LeadTagResponse, LeadTagAssignmentCreate
+from app.schemas.tag import (
+    LeadTagCreate, LeadTagResponse, LeadTagAssignmentCreate, LeadTagBulkRequest, LeadTagBulkResult
+)
 from app.auth import get_current_user
 from app.services.activity_logger import ActivityLogger
+from app.services.lead_bulk import LeadBulkService, LEAD_MODELS
+from app.services.tag_index import tag_index
 
 router = APIRouter()
 
 @router.get("/", response_model=List[LeadTagResponse])
-async def get_lead_tags(
+def get_lead_tags(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -20,7 +24,7 @@ async def get_lead_tags(
     return [LeadTagResponse.from_orm(tag) for tag in tags]
 
 @router.post("/", response_model=LeadTagResponse)
-async def create_lead_tag(
+def create_lead_tag(
     tag_data: LeadTagCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -54,7 +58,7 @@ async def create_lead_tag(
     return LeadTagResponse.from_orm(db_tag)
 
 @router.post("/assign")
-async def assign_tag_to_lead(
+def assign_tag_to_lead(
     assignment_data: LeadTagAssignmentCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -82,6 +86,7 @@ async def assign_tag_to_lead(
     
     db.add(db_assignment)
     db.commit()
+    tag_index.add([(assignment_data.lead_type, assignment_data.lead_id, assignment_data.tag_id)])
     
     # Log activity
     tag = db.query(LeadTag).filter(LeadTag.id == assignment_data.tag_id).first()
@@ -93,8 +98,82 @@ async def assign_tag_to_lead(
     
     return {"message": "Tag assigned successfully"}
 
+def _validate_bulk_request(bulk_request: LeadTagBulkRequest):
+    if bulk_request.lead_type not in LEAD_MODELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lead_type must be 'auto' or 'final'"
+        )
+    if not bulk_request.lead_ids or not bulk_request.tag_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lead_ids and tag_ids must not be empty"
+        )
+
+@router.post("/bulk/assign", response_model=LeadTagBulkResult)
+def bulk_assign_tags(
+    bulk_request: LeadTagBulkRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Assign a set of tags to a set of leads"""
+    _validate_bulk_request(bulk_request)
+    items = LeadBulkService.assign_tags(
+        db, bulk_request.lead_ids, bulk_request.lead_type, bulk_request.tag_ids
+    )
+    assigned = [
+        (bulk_request.lead_type, item["lead_id"], item["tag_id"])
+        for item in items if item["result"] == "assigned"
+    ]
+    tag_index.add(assigned)
+    changed_count = len(assigned)
+    
+    # Log activity
+    if changed_count:
+        ActivityLogger.log_activity(
+            db, current_user, "assign_tag",
+            f"Assigned {len(bulk_request.tag_ids)} tags across {bulk_request.lead_type} leads ({changed_count} new assignments)",
+            bulk_request.lead_type + "_lead",
+            metadata={"tag_ids": bulk_request.tag_ids, "lead_count": len(set(bulk_request.lead_ids)), "assigned_count": changed_count},
+            request=request
+        )
+    
+    return LeadTagBulkResult(changed_count=changed_count, items=items)
+
+@router.post("/bulk/remove", response_model=LeadTagBulkResult)
+def bulk_remove_tags(
+    bulk_request: LeadTagBulkRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a set of tags from a set of leads"""
+    _validate_bulk_request(bulk_request)
+    items = LeadBulkService.remove_tags(
+        db, bulk_request.lead_ids, bulk_request.lead_type, bulk_request.tag_ids
+    )
+    removed = [
+        (bulk_request.lead_type, item["lead_id"], item["tag_id"])
+        for item in items if item["result"] == "removed"
+    ]
+    tag_index.remove(removed)
+    changed_count = len(removed)
+    
+    # Log activity
+    if changed_count:
+        ActivityLogger.log_activity(
+            db, current_user, "remove_tag",
+            f"Removed {len(bulk_request.tag_ids)} tags from {bulk_request.lead_type} leads ({changed_count} assignments)",
+            bulk_request.lead_type + "_lead",
+            metadata={"tag_ids": bulk_request.tag_ids, "lead_count": len(set(bulk_request.lead_ids)), "removed_count": changed_count},
+            request=request
+        )
+    
+    return LeadTagBulkResult(changed_count=changed_count, items=items)
+
 @router.delete("/assign/{assignment_id}")
-async def remove_tag_from_lead(
+def remove_tag_from_lead(
     assignment_id: str,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -114,6 +193,7 @@ async def remove_tag_from_lead(
     tag = db.query(LeadTag).filter(LeadTag.id == assignment.tag_id).first()
     db.delete(assignment)
     db.commit()
+    tag_index.remove([(assignment.lead_type, assignment.lead_id, assignment.tag_id)])
     
     # Log activity
     ActivityLogger.log_activity(
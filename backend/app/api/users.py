@@ -4,13 +4,14 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
-from app.auth import get_password_hash, require_admin, get_current_user
+from app.auth import password_hasher, require_admin, get_current_user
 from app.services.activity_logger import ActivityLogger
+from app.user_cache import user_cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
-async def get_users(
+def get_users(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(require_admin),
@@ -21,7 +22,7 @@ async def get_users(
     return [UserResponse.from_orm(user) for user in users]
 
 @router.post("/", response_model=UserResponse)
-async def create_user(
+def create_user(
     user_data: UserCreate,
     request: Request,
     current_user: User = Depends(require_admin),
@@ -37,7 +38,7 @@ async def create_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = password_hasher.hash(user_data.password)
     db_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -57,7 +58,7 @@ async def create_user(
     return UserResponse.from_orm(db_user)
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -80,7 +81,7 @@ async def get_user(
     return UserResponse.from_orm(user)
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: str,
     user_update: UserUpdate,
     request: Request,
@@ -113,6 +114,7 @@ async def update_user(
     
     if changes:
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         
         # Log activity
@@ -123,7 +125,7 @@ async def update_user(
     return UserResponse.from_orm(user)
 
 @router.delete("/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: str,
     request: Request,
     current_user: User = Depends(require_admin),
@@ -140,6 +142,7 @@ async def delete_user(
     # Soft delete
     user.is_active = False
     db.commit()
+    user_cache.invalidate(user.id)
     
     # Log activity
     ActivityLogger.log_delete(
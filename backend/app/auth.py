@@ -1,5 +1,7 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
@@ -8,18 +10,47 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.config import settings
+from app.user_cache import user_cache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; hashes made with a different cost are flagged for rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 # JWT token handling
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated pool so login bursts cannot take over
+    the request threadpool. Once `password_hash_workers` hashes are running and
+    `password_hash_max_queue` more are waiting, further calls fail fast with 429.
+    """
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    def __init__(self, workers: int, max_queue: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent sign-in attempts, please retry",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password, returning a new hash when the stored one uses an outdated cost"""
+        return self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def hash(self, password: str) -> str:
+        return self._run(pwd_context.hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_queue)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -52,7 +83,7 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     user_id = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    user = user_cache.get(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
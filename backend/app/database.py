@@ -2,15 +2,23 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.query_stats import instrument_engine
 
 # Create database engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_recycle=300,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
     echo=settings.debug
 )
 
+# Count statements and DB time per request / task
+if settings.sql_instrumentation_enabled:
+    instrument_engine(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional, Sequence, Type, get_args
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Validate a comma-separated `fields` parameter against a response schema"""
+    if fields is None:
+        return None
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in schema.model_fields]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "fields must not be empty"
+        )
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+def loader_options(
+    model,
+    fields: Optional[List[str]],
+    relationship_loaders: Dict[str, Any],
+    required_columns: Sequence[Any] = ()
+) -> List[Any]:
+    """Loader options matching what the response will serialize.
+
+    Without `fields` every relationship in the response schema is eager
+    loaded. With `fields` only the requested columns (plus `required_columns`,
+    e.g. the keyset sort columns) are loaded, heavy columns such as JSON blobs
+    stay deferred, and only requested relationships are eager loaded.
+    """
+    if fields is None:
+        return list(relationship_loaders.values())
+
+    column_keys = set(inspect(model).column_attrs.keys())
+    columns = [getattr(model, field) for field in fields if field in column_keys]
+    columns += [column for column in required_columns if column.key not in fields]
+    options = [load_only(*columns, raiseload=True)]
+    options += [loader for name, loader in relationship_loaders.items() if name in fields]
+    return options
+
+def _nested_schema(annotation: Any) -> Optional[Type[BaseModel]]:
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+def project(obj: Any, fields: List[str], schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Serialize only `fields` of an ORM object the way `schema` would"""
+    values = {}
+    for field in fields:
+        value = getattr(obj, field)
+        nested = _nested_schema(schema.model_fields[field].annotation)
+        if nested is not None and value is not None:
+            value = nested.from_orm(value)
+        values[field] = value
+    return schema.model_construct(**values).model_dump(mode="json", include=set(fields))
+
+def sparse_response(
+    objects: List[Any],
+    fields: List[str],
+    schema: Type[BaseModel],
+    paged: bool = False,
+    next_cursor: Optional[str] = None
+) -> JSONResponse:
+    """Projected objects as a plain list, or as a cursor page when `paged`"""
+    items = [project(obj, fields, schema) for obj in objects]
+    if not paged:
+        return JSONResponse(content=items)
+    return JSONResponse(content={"items": items, "next_cursor": next_cursor})
@@ -3,8 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.api import api_router
+from app.services.http_client import close_http_client
+from app.services.tag_index import tag_index
+from app.auth import password_hasher
+from app.services.activity_buffer import activity_buffer
+from app.query_stats import start_tracking, stop_tracking, check_budget
+import anyio
 import uvicorn
 
 # Create database tables
@@ -26,11 +32,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms"],
 )
 
+@app.middleware("http")
+async def track_sql_queries(request: Request, call_next):
+    token = start_tracking(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        stats = stop_tracking(token)
+    
+    if settings.debug:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.1f}"
+    check_budget(stats, settings.sql_query_budget)
+    return response
+
 # Include API routes
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def size_threadpool():
+    # Route handlers are sync and run on this pool; let it hold as many as the DB pool can
+    # serve, keeping back the connections the dashboard's report workers may hold
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(
+        1, settings.db_pool_size + settings.db_max_overflow - settings.report_query_workers
+    )
+
+@app.on_event("startup")
+async def build_tag_index():
+    db = SessionLocal()
+    try:
+        tag_index.rebuild(db)
+    except SQLAlchemyError as e:
+        print(f"Tag index build failed, will retry on first use: {e}")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def close_pooled_connections():
+    close_http_client()
+    password_hasher.shutdown()
+    activity_buffer.stop()
+
 # Global exception handler
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
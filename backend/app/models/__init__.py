@@ -6,6 +6,9 @@ from .lead import AutoLead, FinalLead
 from .tag import LeadTag, LeadTagAssignment
 from .note import LeadNote
 from .activity import ActivityLog
+from .email_outbox import EmailOutbox
+from .export_job import ExportJob
+from .report import LeadDailyCount
 
 __all__ = [
     "User",
@@ -18,5 +21,8 @@ __all__ = [
     "LeadTag",
     "LeadTagAssignment",
     "LeadNote",
-    "ActivityLog"
+    "ActivityLog",
+    "EmailOutbox",
+    "ExportJob",
+    "LeadDailyCount"
 ]
\ No newline at end of file
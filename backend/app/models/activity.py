@@ -1,23 +1,42 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Index, DDL, event
 from sqlalchemy.dialects.mysql import CHAR, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 import uuid
+from datetime import datetime
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
     
     id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(CHAR(36), ForeignKey("users.id"))
+    user_id = Column(CHAR(36))  # No FK: MySQL cannot partition tables with foreign keys
     activity_type = Column(String(50), nullable=False)  # login, create, update, etc.
     entity_type = Column(String(50))  # lead, campaign, product, etc.
     entity_id = Column(CHAR(36))
     description = Column(Text, nullable=False)
-    metadata = Column(JSON)
+    activity_metadata = Column("metadata", JSON)  # `metadata` is reserved by Declarative
     ip_address = Column(String(45))  # IPv6 compatible
     user_agent = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key because MySQL partitions the table on it
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow, server_default=func.now())
     
     # Relationships
-    user = relationship("User", backref="activity_logs")
\ No newline at end of file
+    user = relationship("User", primaryjoin="foreign(ActivityLog.user_id) == User.id", backref="activity_logs")
+    
+    # Composite indexes backing keyset pagination
+    __table_args__ = (
+        Index("ix_activity_logs_created_at_id", "created_at", "id"),
+        Index("ix_activity_logs_user_created_at_id", "user_id", "created_at", "id"),
+    )
+
+# Monthly RANGE partitions on MySQL; app.services.activity_archive adds the
+# upcoming months and archives and drops expired ones
+event.listen(
+    ActivityLog.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE activity_logs PARTITION BY RANGE (TO_DAYS(created_at)) "
+        "(PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    ).execute_if(dialect="mysql")
+)
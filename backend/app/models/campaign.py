@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, Enum
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, Enum, Index
 from sqlalchemy.dialects.mysql import CHAR, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -25,13 +25,20 @@ class Campaign(Base):
     scheduled_at = Column(DateTime(timezone=True))
     is_recurring = Column(Boolean, default=False)
     recurrence_pattern = Column(String(50))  # weekly, monthly, etc.
+    run_timeout_seconds = Column(Integer)  # Falls back to settings when unset
+    dispatched_at = Column(DateTime(timezone=True))  # Set when the scheduler claims the run
     leads_generated = Column(Integer, default=0)
     created_by = Column(CHAR(36), ForeignKey("users.id"))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     product = relationship("Product", back_populates="campaigns")
     region = relationship("Region", back_populates="campaigns")
     creator = relationship("User", backref="created_campaigns")
-    auto_leads = relationship("AutoLead", back_populates="campaign")
\ No newline at end of file
+    auto_leads = relationship("AutoLead", back_populates="campaign")
+    
+    __table_args__ = (
+        Index("ix_campaigns_status_scheduled_at", "status", "scheduled_at"),
+        Index("ix_campaigns_created_at_id", "created_at", "id"),
+    )
\ No newline at end of file
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, Enum, Index, UniqueConstraint
+from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+import uuid
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text)
+    dedup_key = Column(String(255), nullable=False)  # Same key is sent at most once per recipient
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True))
+    sent_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("dedup_key", "recipient"),
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
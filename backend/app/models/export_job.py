@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Enum
+from sqlalchemy.dialects.mysql import CHAR, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+import uuid
+
+class ExportFormat(str, enum.Enum):
+    PARQUET = "parquet"
+    CSV_GZIP = "csv_gzip"
+    ARROW = "arrow"
+
+class ExportStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    
+    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    lead_type = Column(String(10), nullable=False)  # 'auto' or 'final'
+    format = Column(Enum(ExportFormat), nullable=False)
+    filters = Column(JSON)  # Same filters as the lead list endpoints
+    status = Column(Enum(ExportStatus), default=ExportStatus.PENDING, nullable=False)
+    total_rows = Column(Integer)
+    rows_written = Column(Integer, default=0)
+    file_path = Column(String(500))
+    file_size = Column(Integer)
+    error = Column(Text)
+    created_by = Column(CHAR(36), ForeignKey("users.id"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    
+    # Relationships
+    creator = relationship("User", backref="export_jobs")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Numeric, Enum
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Numeric, Enum, Integer, Index
 from sqlalchemy.dialects.mysql import CHAR, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -33,17 +33,28 @@ class AutoLead(Base):
     employee_count = Column(String(50))
     revenue_range = Column(String(50))
     keywords_matched = Column(JSON)  # Store as JSON array
-    relevance_score = Column(Numeric(3, 2), default=0.0)
+    relevance_score = Column(Numeric(3, 2), default=0.0, server_default="0", nullable=False)  # Keyset sort column
+    rank = Column(Integer)  # Provisional while the run streams, final afterwards
     status = Column(Enum(LeadStatus), default=LeadStatus.GENERATED)
     is_selected = Column(Boolean, default=False)
+    over_limit = Column(Boolean, default=False, server_default="0", nullable=False)  # Outside its run's top campaign_lead_limit
     source = Column(String(100))  # duckduckgo, opencorporates, etc.
     raw_data = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     campaign = relationship("Campaign", back_populates="auto_leads")
     final_lead = relationship("FinalLead", back_populates="auto_lead", uselist=False)
+    
+    # Composite indexes backing keyset pagination
+    __table_args__ = (
+        Index("ix_auto_leads_created_at_id", "created_at", "id"),
+        Index("ix_auto_leads_relevance_score_id", "relevance_score", "id"),
+        Index("ix_auto_leads_campaign_created_at_id", "campaign_id", "created_at", "id"),
+        Index("ix_auto_leads_campaign_relevance_score_id", "campaign_id", "relevance_score", "id"),
+        Index("ft_auto_leads_search", "company_name", "industry", "address", mysql_prefix="FULLTEXT"),
+    )
 
 class FinalLead(Base):
     __tablename__ = "final_leads"
@@ -60,7 +71,7 @@ class FinalLead(Base):
     employee_count = Column(String(50))
     revenue_range = Column(String(50))
     keywords_matched = Column(JSON)
-    relevance_score = Column(Numeric(3, 2), default=0.0)
+    relevance_score = Column(Numeric(3, 2), default=0.0, server_default="0", nullable=False)  # Keyset sort column
     status = Column(Enum(LeadStatus), default=LeadStatus.APPROVED)
     priority = Column(Enum(LeadPriority), default=LeadPriority.MEDIUM)
     assigned_to = Column(CHAR(36), ForeignKey("users.id"))
@@ -70,10 +81,17 @@ class FinalLead(Base):
     notes = Column(Text)
     approved_by = Column(CHAR(36), ForeignKey("users.id"))
     approved_at = Column(DateTime(timezone=True), server_default=func.now())
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     auto_lead = relationship("AutoLead", back_populates="final_lead")
     assigned_user = relationship("User", foreign_keys=[assigned_to], backref="assigned_leads")
-    approver = relationship("User", foreign_keys=[approved_by], backref="approved_leads")
\ No newline at end of file
+    approver = relationship("User", foreign_keys=[approved_by], backref="approved_leads")
+    
+    # Composite indexes backing keyset pagination
+    __table_args__ = (
+        Index("ix_final_leads_created_at_id", "created_at", "id"),
+        Index("ix_final_leads_relevance_score_id", "relevance_score", "id"),
+        Index("ft_final_leads_search", "company_name", "industry", "address", "notes", mysql_prefix="FULLTEXT"),
+    )
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Date, Integer, Enum, Index
+from sqlalchemy.dialects.mysql import CHAR
+from app.database import Base
+from app.models.lead import LeadStatus
+
+class LeadDailyCount(Base):
+    """Lead counts per creation day, campaign, source and current status.
+
+    Maintained incrementally by app.services.lead_rollup on every lead write;
+    region and product come from the lead's campaign.
+    """
+    __tablename__ = "lead_daily_counts"
+
+    day = Column(Date, primary_key=True)  # Day the lead was created
+    lead_type = Column(String(10), primary_key=True)  # 'auto' or 'final'
+    campaign_id = Column(CHAR(36), primary_key=True, default="")  # '' for leads without a campaign
+    source = Column(String(100), primary_key=True, default="")
+    status = Column(Enum(LeadStatus), primary_key=True)
+    lead_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_lead_daily_counts_type_campaign", "lead_type", "campaign_id"),
+    )
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, DateTime, Numeric
+from sqlalchemy.orm import Query
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row into an opaque cursor"""
+    serialized = [
+        value.isoformat() if isinstance(value, datetime)
+        else str(value) if isinstance(value, Decimal)
+        else value
+        for value in values
+    ]
+    raw = json.dumps(serialized, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    """Decode a cursor back into typed sort key values for `columns`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match sort order")
+        decoded = []
+        for column, value in zip(columns, values):
+            if value is None:
+                raise ValueError("cursor has a null sort key")
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Numeric):
+                value = Decimal(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_paginate(
+    query: Query,
+    columns: List[Any],
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Return one page ordered by `columns` descending, plus the next cursor.
+
+    The last column must be unique (the primary key) so the order is total,
+    and every column must be NOT NULL: a NULL sort key compares as unknown,
+    so rows holding one would be skipped or end the paging early.
+    Rows after the cursor are found with an expanded row comparison, e.g.
+    `a < :a OR (a = :a AND b < :b)`, which a composite index on the same
+    columns can serve as a range scan regardless of page depth.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        conditions = []
+        for i, column in enumerate(columns):
+            equal_prefix = [columns[j] == values[j] for j in range(i)]
+            conditions.append(and_(*equal_prefix, column < values[i]))
+        query = query.filter(or_(*conditions))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows, next_cursor
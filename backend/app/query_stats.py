@@ -0,0 +1,109 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists and multi-row VALUES collapse to one shape
+_PLACEHOLDER_LIST = re.compile(r"(\?|%s|%\(\w+\)s|:\w+)(\s*,\s*(\?|%s|%\(\w+\)s|:\w+))+")
+_VALUES_ROWS = re.compile(r"(\([^()]*\))(\s*,\s*\([^()]*\))+")
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER_LIST.sub(r"\1, ...", statement)
+    return _VALUES_ROWS.sub(r"\1, ...", shape)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryStats:
+    """Statements run by one unit of work (an HTTP request or a Celery task)"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        threshold = settings.sql_n_plus_one_threshold
+        if threshold and self.shapes[shape] == threshold + 1:
+            logger.warning(
+                f"Possible N+1 in {self.label}: statement ran more than {threshold} times: "
+                f"{' '.join(shape.split())[:300]}"
+            )
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+def start_tracking(label: str) -> Token:
+    return _current.set(QueryStats(label))
+
+def stop_tracking(token: Token) -> Optional[QueryStats]:
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    """Count the statements run inside the block"""
+    token = start_tracking(label)
+    try:
+        yield _current.get()
+    finally:
+        stop_tracking(token)
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "query budget") -> Iterator[QueryStats]:
+    """Fail with QueryBudgetExceeded if the block runs more than `max_queries` statements.
+
+    Meant for tests, e.g. `with query_budget(3): client.get("/api/leads/final")`.
+    """
+    with track_queries(label) as stats:
+        yield stats
+    check_budget(stats, max_queries)
+
+def check_budget(stats: QueryStats, max_queries: int):
+    if max_queries and stats.count > max_queries:
+        shapes = "\n".join(
+            f"  {count}x {' '.join(shape.split())[:200]}" for shape, count in stats.shapes.most_common(5)
+        )
+        raise QueryBudgetExceeded(
+            f"{stats.label} ran {stats.count} statements, budget is {max_queries}:\n{shapes}"
+        )
+
+def instrument_engine(engine: Engine):
+    """Time every statement and attribute it to the current unit of work"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_times"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_times"):
+            connection.info["query_start_times"].pop()
@@ -0,0 +1,16 @@
+import redis
+from app.config import settings
+
+_redis_client = None
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client, created on first use"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_timeout=1,
+            socket_connect_timeout=1
+        )
+    return _redis_client
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import secrets
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.campaign import Campaign
+from app.models.product import Product
+from app.models.region import Region
+from app.redis_client import get_redis
+
+# Data a report depends on; each has a version counter in Redis
+LEADS = "leads"
+CAMPAIGNS = "campaigns"
+
+# Writes to these models change campaign, region or product figures
+_CAMPAIGN_MODELS = (Campaign, Region, Product)
+
+# How long a request waits for another one to fill an empty entry
+_COLD_WAIT_SECONDS = 2.0
+
+# Deletes the lock only if it still holds our token, so an expired lock
+# taken over by another request is left alone
+_UNLOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+def _version_key(scope: str) -> str:
+    return f"reports:version:{scope}"
+
+def _entry_key(name: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    return f"reports:entry:{name}:{digest}"
+
+class ReportCache:
+    """Redis cache of report responses with write-driven invalidation.
+
+    Each entry records the version counters of the data it was computed
+    from. Lead and campaign writes bump those counters after their
+    transaction commits, which makes existing entries stale. Stale or
+    expired entries are still served while one request, holding a short
+    Redis lock, recomputes them; the others never touch the database. If
+    Redis is unavailable reports are computed directly.
+    """
+
+    def get_or_compute(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        scopes: Sequence[str],
+        compute: Callable[[], Any]
+    ) -> Any:
+        if not settings.report_cache_enabled:
+            return compute()
+
+        key = _entry_key(name, params)
+        try:
+            entry, version = self._read(key, scopes)
+        except RedisError:
+            return compute()
+
+        if entry is not None and entry["version"] == version and entry["fresh_until"] > time.time():
+            return entry["value"]
+
+        token = self._lock(key)
+        if token is None:
+            if entry is not None:
+                return entry["value"]
+            # Cold entry being filled by another request; wait for it briefly
+            deadline = time.monotonic() + _COLD_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                try:
+                    entry, _ = self._read(key, scopes)
+                except RedisError:
+                    break
+                if entry is not None:
+                    return entry["value"]
+            return compute()
+
+        try:
+            value = compute()
+            self._store(key, version, value)
+            return value
+        finally:
+            self._unlock(key, token)
+
+    def mark_changed(self, db: Session, *scopes: str):
+        """Bump `scopes` once `db` commits; nothing is bumped if it rolls back"""
+        db.info.setdefault("report_scopes", set()).update(scopes)
+
+    def bump(self, *scopes: str):
+        try:
+            pipe = get_redis().pipeline()
+            for scope in scopes:
+                pipe.incr(_version_key(scope))
+            pipe.execute()
+        except RedisError as e:
+            print(f"Report cache invalidation error: {e}")
+
+    def _read(self, key: str, scopes: Sequence[str]):
+        pipe = get_redis().pipeline()
+        pipe.get(key)
+        pipe.mget([_version_key(scope) for scope in scopes])
+        raw, versions = pipe.execute()
+        version = ".".join(value or "0" for value in versions)
+        return (json.loads(raw) if raw else None), version
+
+    def _store(self, key: str, version: str, value: Any):
+        entry = {"version": version, "fresh_until": time.time() + settings.report_cache_ttl_seconds, "value": value}
+        try:
+            get_redis().set(key, json.dumps(entry), ex=settings.report_cache_stale_seconds)
+        except RedisError:
+            pass
+
+    def _lock(self, key: str) -> Optional[str]:
+        """Token of the acquired recompute lock, or None if another request holds it"""
+        token = secrets.token_hex(16)
+        try:
+            acquired = get_redis().set(f"{key}:lock", token, nx=True, ex=settings.report_cache_lock_seconds)
+        except RedisError:
+            return token
+        return token if acquired else None
+
+    def _unlock(self, key: str, token: str):
+        try:
+            get_redis().eval(_UNLOCK_SCRIPT, 1, f"{key}:lock", token)
+        except RedisError:
+            pass
+
+report_cache = ReportCache()
+
+@event.listens_for(Session, "after_flush")
+def _mark_campaign_writes(session, flush_context):
+    if any(isinstance(obj, _CAMPAIGN_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        report_cache.mark_changed(session, CAMPAIGNS)
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    scopes = session.info.pop("report_scopes", None)
+    if scopes and settings.report_cache_enabled:
+        report_cache.bump(*sorted(scopes))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("report_scopes", None)
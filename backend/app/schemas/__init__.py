@@ -1,19 +1,26 @@
 from .user import UserCreate, UserUpdate, UserResponse, UserLogin
 from .product import ProductCreate, ProductUpdate, ProductResponse
 from .region import RegionResponse
-from .campaign import CampaignCreate, CampaignUpdate, CampaignResponse
-from .lead import AutoLeadCreate, AutoLeadResponse, FinalLeadCreate, FinalLeadResponse
-from .tag import LeadTagCreate, LeadTagResponse
+from .campaign import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignPage
+from .lead import (
+    AutoLeadCreate, AutoLeadResponse, AutoLeadPage, FinalLeadCreate, FinalLeadResponse, FinalLeadPage,
+    FinalLeadBulkUpdate, FinalLeadBulkResult
+)
+from .tag import LeadTagCreate, LeadTagResponse, LeadTagBulkRequest, LeadTagBulkResult
 from .note import LeadNoteCreate, LeadNoteResponse
-from .activity import ActivityLogResponse
+from .activity import ActivityLogResponse, ActivityLogPage
+from .export import ExportJobCreate, ExportJobResponse
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserLogin",
     "ProductCreate", "ProductUpdate", "ProductResponse",
     "RegionResponse",
-    "CampaignCreate", "CampaignUpdate", "CampaignResponse",
-    "AutoLeadCreate", "AutoLeadResponse", "FinalLeadCreate", "FinalLeadResponse",
-    "LeadTagCreate", "LeadTagResponse",
+    "CampaignCreate", "CampaignUpdate", "CampaignResponse", "CampaignPage",
+    "AutoLeadCreate", "AutoLeadResponse", "AutoLeadPage",
+    "FinalLeadCreate", "FinalLeadResponse", "FinalLeadPage",
+    "FinalLeadBulkUpdate", "FinalLeadBulkResult",
+    "LeadTagCreate", "LeadTagResponse", "LeadTagBulkRequest", "LeadTagBulkResult",
     "LeadNoteCreate", "LeadNoteResponse",
-    "ActivityLogResponse"
+    "ActivityLogResponse", "ActivityLogPage",
+    "ExportJobCreate", "ExportJobResponse"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Any, List
 from datetime import datetime
 from app.schemas.user import UserResponse
 
@@ -10,11 +10,15 @@ class ActivityLogResponse(BaseModel):
     entity_type: Optional[str] = None
     entity_id: Optional[str] = None
     description: str
-    metadata: Optional[dict] = None
+    activity_metadata: Optional[dict] = Field(None, serialization_alias="metadata")
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
     created_at: datetime
     user: Optional[UserResponse] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ActivityLogPage(BaseModel):
+    items: List[ActivityLogResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
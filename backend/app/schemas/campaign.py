@@ -14,6 +14,7 @@ class CampaignBase(BaseModel):
     scheduled_at: Optional[datetime] = None
     is_recurring: bool = False
     recurrence_pattern: Optional[str] = None
+    run_timeout_seconds: Optional[int] = None
 
 class CampaignCreate(CampaignBase):
     pass
@@ -28,6 +29,7 @@ class CampaignUpdate(BaseModel):
     scheduled_at: Optional[datetime] = None
     is_recurring: Optional[bool] = None
     recurrence_pattern: Optional[str] = None
+    run_timeout_seconds: Optional[int] = None
 
 class CampaignResponse(CampaignBase):
     id: str
@@ -40,4 +42,8 @@ class CampaignResponse(CampaignBase):
     region: Optional[RegionResponse] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CampaignPage(BaseModel):
+    items: List[CampaignResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
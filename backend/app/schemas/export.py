@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional, List, Literal
+from datetime import datetime
+from app.models.export_job import ExportFormat, ExportStatus
+
+class ExportFilters(BaseModel):
+    status_filter: Optional[str] = None
+    assigned_to: Optional[str] = None
+    campaign_id: Optional[str] = None
+    search: Optional[str] = None
+    search_mode: Literal["boolean", "natural"] = "boolean"
+    tags: Optional[List[str]] = None
+    tags_any: Optional[List[str]] = None
+
+class ExportJobCreate(BaseModel):
+    lead_type: str = "final"  # 'auto' or 'final'
+    format: ExportFormat = ExportFormat.PARQUET
+    filters: ExportFilters = ExportFilters()
+
+class ExportJobResponse(BaseModel):
+    id: str
+    lead_type: str
+    format: ExportFormat
+    filters: Optional[dict] = None
+    status: ExportStatus
+    total_rows: Optional[int] = None
+    rows_written: int = 0
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_by: str
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
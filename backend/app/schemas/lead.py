@@ -28,6 +28,8 @@ class AutoLeadResponse(AutoLeadBase):
     campaign_id: str
     status: LeadStatus
     is_selected: bool
+    over_limit: bool = False
+    rank: Optional[int] = None
     raw_data: Optional[dict] = None
     created_at: datetime
     updated_at: datetime
@@ -35,6 +37,10 @@ class AutoLeadResponse(AutoLeadBase):
     class Config:
         from_attributes = True
 
+class AutoLeadPage(BaseModel):
+    items: List[AutoLeadResponse]
+    next_cursor: Optional[str] = None
+
 class FinalLeadBase(BaseModel):
     company_name: str
     website: Optional[str] = None
@@ -67,6 +73,24 @@ class FinalLeadUpdate(BaseModel):
     conversion_probability: Optional[Decimal] = None
     notes: Optional[str] = None
 
+class FinalLeadFilters(BaseModel):
+    status_filter: Optional[str] = None
+    assigned_to: Optional[str] = None
+    search: Optional[str] = None
+    search_mode: str = "boolean"
+    tags: Optional[List[str]] = None
+    tags_any: Optional[List[str]] = None
+
+class FinalLeadBulkUpdate(BaseModel):
+    lead_ids: Optional[List[str]] = None
+    filters: Optional[FinalLeadFilters] = None
+    updates: FinalLeadUpdate
+
+class FinalLeadBulkResult(BaseModel):
+    matched_count: int
+    updated_count: int
+    changes: dict = {}
+
 class FinalLeadResponse(FinalLeadBase):
     id: str
     auto_lead_id: Optional[str] = None
@@ -78,4 +102,8 @@ class FinalLeadResponse(FinalLeadBase):
     assigned_user: Optional[UserResponse] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FinalLeadPage(BaseModel):
+    items: List[FinalLeadResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class LeadTagBase(BaseModel):
@@ -21,4 +21,17 @@ class LeadTagResponse(LeadTagBase):
 class LeadTagAssignmentCreate(BaseModel):
     lead_id: str
     lead_type: str  # 'auto' or 'final'
-    tag_id: str
\ No newline at end of file
+    tag_id: str
+class LeadTagBulkRequest(BaseModel):
+    lead_ids: List[str]
+    lead_type: str  # 'auto' or 'final'
+    tag_ids: List[str]
+
+class LeadTagBulkItem(BaseModel):
+    lead_id: str
+    tag_id: str
+    result: str  # assigned, already_assigned, removed, not_assigned, lead_not_found, tag_not_found
+
+class LeadTagBulkResult(BaseModel):
+    changed_count: int
+    items: List[LeadTagBulkItem]
@@ -0,0 +1,110 @@
+import re
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import or_, false
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session, Query
+from app.models.lead import AutoLead, FinalLead
+from app.services.tag_index import tag_index
+
+# Must list the same columns, in the same order, as each model's FULLTEXT index
+FULLTEXT_COLUMNS = {
+    AutoLead: [AutoLead.company_name, AutoLead.industry, AutoLead.address],
+    FinalLead: [FinalLead.company_name, FinalLead.industry, FinalLead.address, FinalLead.notes],
+}
+
+# InnoDB ignores shorter tokens (innodb_ft_min_token_size)
+MIN_TOKEN_LENGTH = 3
+
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+# The start of an address (local part, '@', maybe part of the domain)
+_EMAIL_PREFIX = re.compile(r"^[^@\s]+@[^@\s]*$")
+
+def _boolean_query(search: str) -> Optional[str]:
+    """Require every word, matching prefixes so partial input still hits"""
+    words = [word for word in _BOOLEAN_OPERATORS.sub(" ", search).split() if len(word) >= MIN_TOKEN_LENGTH]
+    if not words:
+        return None
+    return " ".join(f"+{word}*" for word in words)
+
+def _like_criterion(model, search: str):
+    return or_(
+        model.company_name.contains(search),
+        model.email.contains(search),
+        model.industry.contains(search)
+    )
+
+def lead_search(db: Session, model, search: str, mode: str = "boolean") -> Tuple[Any, Optional[Any]]:
+    """Build the search filter for a lead model and, on MySQL, its relevance score.
+
+    MySQL uses the FULLTEXT index through MATCH ... AGAINST. Other backends, or
+    searches with no token long enough to be indexed, use the original LIKE
+    filter and get no score. Email addresses are not tokenized by FULLTEXT, so
+    on MySQL input that looks like the start of one is matched by prefix.
+    """
+    if mode not in ("boolean", "natural"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="search_mode must be 'boolean' or 'natural'"
+        )
+    
+    if db.bind.dialect.name != "mysql":
+        return _like_criterion(model, search), None
+
+    # Other input with an '@' (e.g. '@acme.com') is a substring match on email
+    if "@" in search:
+        if _EMAIL_PREFIX.match(search.strip()):
+            return model.email.startswith(search.strip()), None
+        return _like_criterion(model, search), None
+
+    if mode == "natural":
+        against = search if len(search.strip()) >= MIN_TOKEN_LENGTH else None
+        expression = match(*FULLTEXT_COLUMNS[model], against=against).in_natural_language_mode() if against else None
+    else:
+        against = _boolean_query(search)
+        expression = match(*FULLTEXT_COLUMNS[model], against=against).in_boolean_mode() if against else None
+
+    if expression is None:
+        return _like_criterion(model, search), None
+    return expression, expression
+
+def apply_lead_filters(
+    db: Session,
+    query: Query,
+    model,
+    status_filter: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    campaign_id: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: str = "boolean",
+    tags: Optional[List[str]] = None,
+    tags_any: Optional[List[str]] = None
+) -> Tuple[Query, Optional[Any]]:
+    """Apply the lead list filters, returning the query and any search score.
+
+    Shared by the list endpoints and background exports so both see the same
+    rows. `assigned_to` only applies to final leads, `campaign_id` to auto leads.
+    Tag filters are resolved through the in-process tag bitmap index: leads
+    must carry every tag in `tags` and at least one in `tags_any`.
+    """
+    if campaign_id and model is AutoLead:
+        query = query.filter(AutoLead.campaign_id == campaign_id)
+
+    if status_filter:
+        query = query.filter(model.status == status_filter)
+
+    if assigned_to and model is FinalLead:
+        query = query.filter(FinalLead.assigned_to == assigned_to)
+
+    if tags or tags_any:
+        lead_type = "auto" if model is AutoLead else "final"
+        lead_ids = tag_index.lead_ids(db, lead_type, tags, tags_any)
+        query = query.filter(model.id.in_(lead_ids) if lead_ids else false())
+
+    search_score = None
+    if search:
+        criterion, search_score = lead_search(db, model, search, search_mode)
+        query = query.filter(criterion)
+
+    return query, search_score
@@ -1,5 +1,14 @@
 from .lead_generation import LeadGenerationService
 from .email_service import EmailService
 from .activity_logger import ActivityLogger
+from .lead_writer import StreamingLeadWriter
+from .deadline import Deadline, DeadlineExceeded
+from .email_outbox import EmailOutboxService, OutboxSender
+from .lead_bulk import LeadBulkService
+from .lead_rollup import LeadRollupService
 
-__all__ = ["LeadGenerationService", "EmailService", "ActivityLogger"]
\ No newline at end of file
+__all__ = [
+    "LeadGenerationService", "EmailService", "ActivityLogger", "StreamingLeadWriter",
+    "Deadline", "DeadlineExceeded", "EmailOutboxService", "OutboxSender", "LeadBulkService",
+    "LeadRollupService"
+]
\ No newline at end of file
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import insert, select, delete, func, text
+from sqlalchemy.engine import Connection
+from app.config import settings
+from app.database import engine
+from app.models.activity import ActivityLog
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+TABLE = ActivityLog.__table__
+ARCHIVE_BATCH_ROWS = 5000
+
+_PARTITION_NAME = re.compile(r"^p(\d{4})(\d{2})$")
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+def _partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+def _partition_definition(month: date) -> str:
+    upper = _add_months(month, 1)
+    return f"PARTITION {_partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))"
+
+def archive_path(month: date) -> str:
+    return os.path.join(settings.activity_archive_dir, f"activity_logs_{month.year:04d}_{month.month:02d}.jsonl.zst")
+
+def _partition_names(connection: Connection) -> List[str]:
+    if connection.dialect.name != "mysql":
+        return []
+    return list(connection.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'activity_logs' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    )).scalars())
+
+def is_partitioned(connection: Connection) -> bool:
+    return bool(_partition_names(connection))
+
+def _monthly_partitions(connection: Connection) -> List[date]:
+    """Months that have their own partition, oldest first"""
+    months = []
+    for name in _partition_names(connection):
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+def ensure_future_partitions(connection: Connection, today: date) -> List[str]:
+    """Split `pmax` so each month up to `activity_partitions_ahead` ahead has a partition"""
+    months = _monthly_partitions(connection)
+    first_needed = _add_months(months[-1], 1) if months else _month_start(today)
+    last_needed = _add_months(_month_start(today), settings.activity_partitions_ahead)
+
+    new_months = []
+    month = first_needed
+    while month <= last_needed:
+        new_months.append(month)
+        month = _add_months(month, 1)
+    if not new_months:
+        return []
+
+    definitions = ", ".join(_partition_definition(month) for month in new_months)
+    connection.execute(text(
+        f"ALTER TABLE activity_logs REORGANIZE PARTITION pmax INTO "
+        f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    ))
+    return [_partition_name(month) for month in new_months]
+
+def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    }
+
+def _write_archive(path: str, rows: Iterator[Dict[str, Any]]) -> int:
+    """Write rows as zstd-compressed JSON lines, replacing `path` atomically"""
+    if pa is None:
+        raise RuntimeError("pyarrow is required to write activity log archives")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = f"{path}.partial"
+    count = 0
+    with pa.output_stream(partial_path, compression="zstd") as stream:
+        for row in rows:
+            stream.write((json.dumps(_serialize(row), separators=(",", ":")) + "\n").encode("utf-8"))
+            count += 1
+    # Make the archive durable before the caller drops the rows it holds
+    _fsync(partial_path)
+    os.replace(partial_path, path)
+    _fsync(os.path.dirname(path) or ".")
+    return count
+
+def _fsync(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _month_rows(connection: Connection, month: date, partitioned: bool) -> Iterator[Dict[str, Any]]:
+    if partitioned:
+        statement = text(f"SELECT * FROM activity_logs PARTITION ({_partition_name(month)})")
+    else:
+        statement = select(TABLE).where(
+            TABLE.c.created_at >= datetime.combine(month, datetime.min.time()),
+            TABLE.c.created_at < datetime.combine(_add_months(month, 1), datetime.min.time())
+        )
+    result = connection.execution_options(stream_results=True, yield_per=ARCHIVE_BATCH_ROWS).execute(statement)
+    for row in result.mappings():
+        yield dict(row)
+
+def _expired_months(connection: Connection, cutoff: date, partitioned: bool) -> List[date]:
+    if partitioned:
+        return [month for month in _monthly_partitions(connection) if month < cutoff]
+
+    # Jump from each month with rows to the next one, skipping empty months
+    months = []
+    after = None
+    while True:
+        statement = select(func.min(TABLE.c.created_at)).where(
+            TABLE.c.created_at < datetime.combine(cutoff, datetime.min.time())
+        )
+        if after is not None:
+            statement = statement.where(TABLE.c.created_at >= datetime.combine(after, datetime.min.time()))
+        oldest = connection.execute(statement).scalar()
+        if oldest is None:
+            return months
+        if isinstance(oldest, str):
+            oldest = datetime.fromisoformat(oldest)
+        month = _month_start(oldest)
+        months.append(month)
+        after = _add_months(month, 1)
+
+def _drop_month(connection: Connection, month: date, partitioned: bool):
+    if partitioned:
+        connection.execute(text(f"ALTER TABLE activity_logs DROP PARTITION {_partition_name(month)}"))
+    else:
+        connection.execute(delete(TABLE).where(
+            TABLE.c.created_at >= datetime.combine(month, datetime.min.time()),
+            TABLE.c.created_at < datetime.combine(_add_months(month, 1), datetime.min.time())
+        ))
+
+def run_retention(today: Optional[date] = None) -> Dict[str, Any]:
+    """Archive and drop months older than `activity_retention_months`.
+
+    On partitioned MySQL tables each month is a partition, so dropping it is
+    a metadata-only operation; upcoming partitions are created in the same
+    run. Other backends, or a MySQL table not yet converted with the
+    `partition` command, archive the month's rows and delete them.
+    """
+    today = today or datetime.utcnow().date()
+    cutoff = _add_months(_month_start(today), -settings.activity_retention_months)
+    summary = {"created": [], "archived": []}
+
+    with engine.connect() as connection:
+        partitioned = is_partitioned(connection)
+        if partitioned:
+            summary["created"] = ensure_future_partitions(connection, today)
+
+        for month in _expired_months(connection, cutoff, partitioned):
+            path = archive_path(month)
+            count = _write_archive(path, _month_rows(connection, month, partitioned))
+            _drop_month(connection, month, partitioned)
+            connection.commit()
+            summary["archived"].append({"month": month.isoformat()[:7], "rows": count, "path": path})
+    return summary
+
+def _read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    if pa is None:
+        raise RuntimeError("pyarrow is required to read activity log archives")
+    buffered = b""
+    with pa.input_stream(path, compression="zstd") as stream:
+        while True:
+            chunk = stream.read(1 << 20)
+            if not chunk:
+                break
+            buffered += chunk
+            *lines, buffered = buffered.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _deserialize(json.loads(line))
+    if buffered.strip():
+        yield _deserialize(json.loads(buffered))
+
+def _deserialize(row: Dict[str, Any]) -> Dict[str, Any]:
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+def _ensure_partitions_from(connection: Connection, month: date):
+    """Give `month` and every month up to the oldest existing partition its own partition"""
+    months = _monthly_partitions(connection)
+    if not months or month >= months[0]:
+        return
+    new_months = []
+    while month < months[0]:
+        new_months.append(month)
+        month = _add_months(month, 1)
+    lowest = months[0]
+    definitions = ", ".join(_partition_definition(month) for month in [*new_months, lowest])
+    connection.execute(text(
+        f"ALTER TABLE activity_logs REORGANIZE PARTITION {_partition_name(lowest)} INTO ({definitions})"
+    ))
+
+def restore_archive(path: str) -> int:
+    """Load an archive back into activity_logs, skipping rows already present.
+
+    Restored months are archived and dropped again by the next retention run
+    unless `activity_retention_months` is raised first.
+    """
+    restored = 0
+    statement = insert(TABLE).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+    with engine.connect() as connection:
+        partitioned = is_partitioned(connection)
+        batch: List[Dict[str, Any]] = []
+        first = True
+        for row in _read_archive(path):
+            if partitioned and first:
+                _ensure_partitions_from(connection, _month_start(row["created_at"]))
+            first = False
+            batch.append(row)
+            if len(batch) >= ARCHIVE_BATCH_ROWS:
+                restored += connection.execute(statement, batch).rowcount
+                batch = []
+        if batch:
+            restored += connection.execute(statement, batch).rowcount
+        connection.commit()
+    return restored
+
+def partition_existing_table(today: Optional[date] = None) -> List[str]:
+    """One-off conversion of an unpartitioned MySQL activity_logs table.
+
+    Drops the user foreign key, widens the primary key to (id, created_at)
+    and creates one partition per month from the oldest row to
+    `activity_partitions_ahead` months ahead. This rebuilds the table.
+    """
+    today = today or datetime.utcnow().date()
+    with engine.connect() as connection:
+        if connection.dialect.name != "mysql":
+            raise RuntimeError("Partitioning is only supported on MySQL")
+        if is_partitioned(connection):
+            return []
+
+        foreign_keys = connection.execute(text(
+            "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'activity_logs' AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+        )).scalars().all()
+        for name in foreign_keys:
+            connection.execute(text(f"ALTER TABLE activity_logs DROP FOREIGN KEY `{name}`"))
+        connection.execute(text(
+            "ALTER TABLE activity_logs MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+        ))
+
+        oldest = connection.execute(select(func.min(TABLE.c.created_at))).scalar()
+        month = _month_start(oldest) if oldest else _month_start(today)
+        last = _add_months(_month_start(today), settings.activity_partitions_ahead)
+        months = []
+        while month <= last:
+            months.append(month)
+            month = _add_months(month, 1)
+        definitions = ", ".join(_partition_definition(month) for month in months)
+        connection.execute(text(
+            f"ALTER TABLE activity_logs PARTITION BY RANGE (TO_DAYS(created_at)) "
+            f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+        connection.commit()
+    return [_partition_name(month) for month in months]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Activity log retention and archive restore")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("partition", help="Convert an existing MySQL activity_logs table to monthly partitions")
+    commands.add_parser("retention", help="Create upcoming partitions, archive and drop expired months")
+    restore = commands.add_parser("restore", help="Load an archive file back into activity_logs")
+    restore.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "partition":
+        print(f"Created partitions: {', '.join(partition_existing_table()) or 'none, already partitioned'}")
+    elif args.command == "retention":
+        print(json.dumps(run_retention(), indent=2))
+    else:
+        print(f"Restored {restore_archive(args.path)} activity log rows from {args.path}")
+
+if __name__ == "__main__":
+    main()
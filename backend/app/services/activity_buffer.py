@@ -0,0 +1,201 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from app.config import settings
+from app.database import engine
+from app.models.activity import ActivityLog
+
+class ActivityBuffer:
+    """Bounded in-process buffer of activity log rows.
+
+    A daemon thread drains it with multi-row INSERTs on its own connection,
+    every `activity_flush_interval_ms` or as soon as `activity_flush_batch_size`
+    rows are waiting. Rows that cannot be buffered (buffer full) or written
+    (database error) are appended to a JSON lines spool file, which is
+    replayed after each successful flush until every row is written or set
+    aside. `stop()` drains the buffer and is called on application shutdown
+    and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=settings.activity_buffer_size)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._spool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._atexit_registered = False
+
+    def enqueue(self, row: Dict[str, Any]):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._spool([row])
+            return
+        if self._queue.qsize() >= settings.activity_flush_batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything currently buffered"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        # Threads do not survive a fork (Celery prefork, uvicorn workers)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="activity-flusher", daemon=True)
+                self._thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.stop)
+                    self._atexit_registered = True
+
+    def _run(self):
+        interval = settings.activity_flush_interval_ms / 1000
+        while not self._stopping.is_set():
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < settings.activity_flush_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(ActivityLog.__table__), batch)
+        except Exception as e:
+            print(f"Activity log flush error, spooling {len(batch)} events: {e}")
+            self._spool(batch)
+            return
+        self._replay_spool()
+
+    def _spool(self, rows: List[Dict[str, Any]]):
+        with self._spool_lock:
+            try:
+                with open(settings.activity_spool_path, "a", encoding="utf-8") as spool:
+                    for row in rows:
+                        spool.write(json.dumps(row, default=_json_default) + "\n")
+            except OSError as e:
+                print(f"Activity log spool error, dropping {len(rows)} events: {e}")
+
+    def _replay_spool(self):
+        """Replay the spool, plus files left over by replays that failed earlier"""
+        path = settings.activity_spool_path
+        if os.path.exists(path):
+            with self._spool_lock:
+                try:
+                    os.replace(path, f"{path}.{os.getpid()}.{int(time.time() * 1000)}.replay")
+                except OSError:
+                    pass
+        for replay_path in sorted(glob.glob(f"{glob.escape(path)}.*.replay")):
+            if not self._replay_file(replay_path):
+                return
+
+    def _replay_file(self, replay_path: str) -> bool:
+        """Insert a replay file batch by batch; False if the database is still failing.
+
+        Rows already written are skipped (INSERT IGNORE), so a file can be
+        retried safely. Rows that fail on their own are set aside in the
+        `.rejected` file instead of holding back the rest.
+        """
+        try:
+            with open(replay_path, encoding="utf-8") as spool:
+                batch = []
+                for line in spool:
+                    if not line.strip():
+                        continue
+                    try:
+                        batch.append(_from_spool(json.loads(line)))
+                    except ValueError:
+                        self._reject([line.rstrip("\n")])
+                        continue
+                    if len(batch) >= settings.activity_flush_batch_size:
+                        if not self._replay_batch(batch):
+                            return False
+                        batch = []
+                if batch and not self._replay_batch(batch):
+                    return False
+        except OSError:
+            # Another process replayed and removed it
+            return True
+        try:
+            os.remove(replay_path)
+        except OSError:
+            pass
+        return True
+
+    def _replay_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        statement = insert(ActivityLog.__table__).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        try:
+            with engine.begin() as connection:
+                connection.execute(statement, batch)
+            return True
+        except Exception as e:
+            batch_error = e
+
+        # Find the rows that fail on their own
+        rejected = []
+        for row in batch:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(statement, [row])
+            except Exception:
+                rejected.append(row)
+        if len(rejected) == len(batch):
+            print(f"Activity log spool replay failed, will retry: {batch_error}")
+            return False
+        print(f"Activity log spool replay set aside {len(rejected)} rows that could not be written")
+        self._reject([json.dumps(row, default=_json_default) for row in rejected])
+        return True
+
+    def _reject(self, lines: List[str]):
+        with self._spool_lock:
+            try:
+                with open(f"{settings.activity_spool_path}.rejected", "a", encoding="utf-8") as rejected:
+                    for line in lines:
+                        rejected.write(line + "\n")
+            except OSError as e:
+                print(f"Activity log spool error, dropping {len(lines)} rejected events: {e}")
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _from_spool(row: Dict[str, Any]) -> Dict[str, Any]:
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+activity_buffer = ActivityBuffer()
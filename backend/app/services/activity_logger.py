@@ -1,6 +1,9 @@
+import json
+import uuid
+from datetime import datetime
 from sqlalchemy.orm import Session
-from app.models.activity import ActivityLog
 from app.models.user import User
+from app.services.activity_buffer import activity_buffer
 from typing import Optional, Dict, Any
 from fastapi import Request
 
@@ -16,7 +19,12 @@ class ActivityLogger:
         metadata: Optional[Dict[str, Any]] = None,
         request: Optional[Request] = None
     ):
-        """Log user activity"""
+        """Log user activity.
+
+        The entry is buffered and written in batches by a background flusher on
+        its own connection, so the caller's session is never committed or
+        rolled back here.
+        """
         try:
             # Extract IP and user agent from request if provided
             ip_address = None
@@ -26,24 +34,23 @@ class ActivityLogger:
                 ip_address = request.client.host if request.client else None
                 user_agent = request.headers.get("user-agent")
             
-            # Create activity log entry
-            activity_log = ActivityLog(
-                user_id=user.id,
-                activity_type=activity_type,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                description=description,
-                metadata=metadata or {},
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
-            
-            db.add(activity_log)
-            db.commit()
+            activity_buffer.enqueue({
+                "id": str(uuid.uuid4()),
+                "user_id": user.id,
+                "activity_type": activity_type,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "description": description,
+                # Keyed by column name (ActivityLog.activity_metadata); round-trip
+                # so enums, dates and decimals are stored as strings
+                "metadata": json.loads(json.dumps(metadata or {}, default=str)),
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "created_at": datetime.utcnow()
+            })
             
         except Exception as e:
             print(f"Activity logging error: {e}")
-            db.rollback()
     
     @staticmethod
     def log_login(db: Session, user: User, request: Optional[Request] = None):
@@ -0,0 +1,218 @@
+import random
+import time
+from typing import Callable, Dict, Any, Optional, Tuple, TypeVar
+import redis
+import httpx
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.deadline import Deadline, DeadlineExceeded
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Upstream statuses worth retrying; anything else is treated as permanent
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised when a lead source is skipped because its breaker is open"""
+
+class CircuitBreaker:
+    """Per-source circuit breaker with state shared across workers in Redis.
+
+    Calls are counted in a fixed window. Once enough calls have been seen and
+    either the error rate or the slow-call rate crosses its threshold, the
+    breaker opens and every caller skips the source until `circuit_open_seconds`
+    has passed. After that a single probe call is let through (half-open): a
+    success closes the breaker, a failure opens it again. Only the caller
+    that was handed the probe by `allow_request` settles the half-open state.
+
+    If Redis is unreachable the breaker fails open so sources are still tried.
+    """
+
+    def __init__(self, name: str, client: Optional[redis.Redis] = None):
+        self.name = name
+        self.client = client
+        prefix = f"circuit:{name}"
+        self._open_key = f"{prefix}:open"
+        self._tripped_key = f"{prefix}:tripped"
+        self._probe_key = f"{prefix}:probe"
+        self._window_key = f"{prefix}:window"
+
+    @property
+    def redis(self) -> redis.Redis:
+        return self.client or get_redis()
+
+    def state(self) -> str:
+        try:
+            if self.redis.exists(self._open_key):
+                return OPEN
+            if self.redis.exists(self._tripped_key):
+                return HALF_OPEN
+        except redis.RedisError:
+            pass
+        return CLOSED
+
+    def allow_request(self) -> Tuple[bool, bool]:
+        """Whether the source may be called right now, and whether the call is the half-open probe"""
+        try:
+            current = self.state()
+            if current == CLOSED:
+                return True, False
+            if current == OPEN:
+                return False, False
+            # Half-open: only one caller gets to probe the source
+            probe = bool(self.redis.set(
+                self._probe_key, "1", nx=True, ex=settings.circuit_open_seconds
+            ))
+            return probe, probe
+        except redis.RedisError:
+            return True, False
+
+    def record_success(self, latency: float, probe: bool = False):
+        self._record(failed=False, latency=latency, probe=probe)
+
+    def record_failure(self, latency: float, probe: bool = False):
+        self._record(failed=True, latency=latency, probe=probe)
+
+    def release_probe(self):
+        """Give up the half-open probe without an outcome, letting another caller take it"""
+        try:
+            self.redis.delete(self._probe_key)
+        except redis.RedisError:
+            pass
+
+    def reset(self):
+        """Force the breaker closed and clear its counters"""
+        try:
+            self.redis.delete(self._open_key, self._tripped_key, self._probe_key, self._window_key)
+        except redis.RedisError as e:
+            print(f"Circuit breaker reset error for {self.name}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and window counters, for the admin endpoint"""
+        try:
+            window = self.redis.hgetall(self._window_key)
+            open_ttl = self.redis.ttl(self._open_key)
+        except redis.RedisError:
+            window, open_ttl = {}, -2
+        calls = int(window.get("calls", 0))
+        failures = int(window.get("failures", 0))
+        slow_calls = int(window.get("slow_calls", 0))
+        return {
+            "source": self.name,
+            "state": self.state(),
+            "calls": calls,
+            "failures": failures,
+            "slow_calls": slow_calls,
+            "error_rate": round(failures / calls, 2) if calls else 0.0,
+            "retry_in_seconds": open_ttl if open_ttl > 0 else 0
+        }
+
+    def _record(self, failed: bool, latency: float, probe: bool):
+        slow = latency >= settings.circuit_slow_call_seconds
+        try:
+            if probe:
+                # Outcome of the half-open probe decides the next state
+                if failed or slow:
+                    self._trip()
+                else:
+                    self.reset()
+                return
+            if self.redis.exists(self._tripped_key):
+                # Calls started before the breaker opened do not count
+                return
+
+            pipe = self.redis.pipeline()
+            pipe.hincrby(self._window_key, "calls", 1)
+            pipe.hincrby(self._window_key, "failures", 1 if failed else 0)
+            pipe.hincrby(self._window_key, "slow_calls", 1 if slow else 0)
+            pipe.expire(self._window_key, settings.circuit_window_seconds, nx=True)
+            calls, failures, slow_calls, _ = pipe.execute()
+
+            if calls < settings.circuit_min_calls:
+                return
+            if (failures / calls >= settings.circuit_error_rate_threshold
+                    or slow_calls / calls >= settings.circuit_slow_rate_threshold):
+                self._trip()
+        except redis.RedisError as e:
+            print(f"Circuit breaker error for {self.name}: {e}")
+
+    def _trip(self):
+        pipe = self.redis.pipeline()
+        pipe.set(self._open_key, "1", ex=settings.circuit_open_seconds)
+        pipe.set(self._tripped_key, "1")
+        pipe.delete(self._probe_key, self._window_key)
+        pipe.execute()
+        print(f"Circuit breaker opened for lead source: {self.name}")
+
+class SourceRateLimiter:
+    """Spaces calls to one lead source at least `source_min_interval_seconds` apart.
+
+    The slot is a Redis key set with NX and a matching expiry, so concurrent
+    campaign runs on every worker share it. Waiting never goes past the run
+    deadline. If Redis is unreachable calls are not delayed.
+    """
+
+    def __init__(self, name: str, client: Optional[redis.Redis] = None):
+        self.name = name
+        self.client = client
+        self._slot_key = f"ratelimit:{name}"
+
+    @property
+    def redis(self) -> redis.Redis:
+        return self.client or get_redis()
+
+    def wait(self, deadline: Optional[Deadline] = None):
+        """Block until this caller may call the source"""
+        interval_ms = int(settings.source_min_interval_seconds * 1000)
+        if interval_ms <= 0:
+            return
+        while True:
+            try:
+                if self.redis.set(self._slot_key, "1", nx=True, px=interval_ms):
+                    return
+                wait_ms = self.redis.pttl(self._slot_key)
+            except redis.RedisError as e:
+                print(f"Rate limiter error for {self.name}: {e}")
+                return
+            # Small jitter so waiting callers do not all retry at once
+            delay = max(wait_ms, 0) / 1000 + random.uniform(0, 0.05)
+            if deadline and deadline.remaining() <= delay:
+                raise DeadlineExceeded(f"Deadline reached waiting to call {self.name}")
+            time.sleep(delay)
+
+def is_transient_error(error: Exception) -> bool:
+    """Connection problems, timeouts and 429/5xx responses are worth retrying"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+def retry_with_backoff(
+    func: Callable[[], T],
+    deadline: Optional[Deadline] = None,
+    max_retries: Optional[int] = None
+) -> T:
+    """Call `func`, retrying transient errors with full-jitter exponential backoff"""
+    if max_retries is None:
+        max_retries = settings.source_max_retries
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient_error(e):
+                raise
+            delay = random.uniform(0, min(
+                settings.source_retry_max_delay,
+                settings.source_retry_base_delay * (2 ** attempt)
+            ))
+            # Never sleep past the run deadline
+            if deadline and deadline.remaining() <= delay:
+                raise
+            time.sleep(delay)
+            attempt += 1
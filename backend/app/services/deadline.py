@@ -0,0 +1,27 @@
+import time
+from typing import Optional
+
+class DeadlineExceeded(Exception):
+    """Raised when a campaign run has used up its time budget"""
+
+class Deadline:
+    """Overall time budget for a campaign run, based on a monotonic clock"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for a single call, capped at `cap` seconds"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+        return min(remaining, cap) if cap is not None else remaining
@@ -0,0 +1,239 @@
+import queue
+import random
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator
+from sqlalchemy import or_, and_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.services.email_service import EmailService
+
+class EmailOutboxService:
+    @staticmethod
+    def enqueue(
+        db: Session,
+        to_emails: List[str],
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        dedup_key: Optional[str] = None
+    ) -> int:
+        """Add one outbox row per recipient to the caller's transaction.
+
+        Nothing is committed here, so the email is only sent if the event that
+        triggered it commits. Recipients that already have a row for the same
+        `dedup_key` are skipped by the unique constraint, also when concurrent
+        callers queue the same email. Returns the number of rows added.
+        """
+        dedup_key = dedup_key or str(uuid.uuid4())
+        recipients = list(dict.fromkeys(email for email in to_emails if email))
+        if not recipients:
+            return 0
+
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "recipient": recipient,
+                "subject": subject,
+                "body": body,
+                "html_body": html_body,
+                "dedup_key": dedup_key,
+                "status": OutboxStatus.PENDING,
+                "attempts": 0
+            }
+            for recipient in recipients
+        ]
+        return db.execute(_insert_ignoring_duplicates(db, rows)).rowcount
+
+def _insert_ignoring_duplicates(db: Session, rows: List[Dict[str, Any]]):
+    dialect = db.get_bind().dialect.name
+    table = EmailOutbox.__table__
+    if dialect == "mysql":
+        return mysql.insert(table).values(rows).prefix_with("IGNORE")
+    statement = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table).values(rows)
+    return statement.on_conflict_do_nothing(index_elements=["dedup_key", "recipient"])
+
+class SMTPConnectionPool:
+    """Bounded pool of authenticated SMTP connections shared by sender threads"""
+
+    def __init__(self, email_service: EmailService, size: int):
+        self.email_service = email_service
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a live connection, opening a new one if none is idle"""
+        self._slots.acquire()
+        try:
+            server = self._take_idle()
+            if server is None:
+                server = self.email_service.connect()
+            try:
+                yield server
+            except smtplib.SMTPServerDisconnected:
+                self._close(server)
+                raise
+            except smtplib.SMTPRecipientsRefused:
+                # Rejected recipient, the session itself is still usable
+                self._idle.put(server)
+                raise
+            except Exception:
+                self._close(server)
+                raise
+            else:
+                self._idle.put(server)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self._close(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+class OutboxSender:
+    """Drains the email outbox with a pool of reusable SMTP connections.
+
+    Rows are claimed in batches with SKIP LOCKED, so several senders can run
+    side by side. Failed sends are retried with exponential backoff until
+    `email_outbox_max_attempts` is reached. Rows stuck in `sending` after a
+    crash are reclaimed once `email_outbox_claim_timeout_seconds` has passed.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None):
+        pool_size = pool_size or settings.email_outbox_pool_size
+        self.email_service = EmailService()
+        self.pool = SMTPConnectionPool(self.email_service, pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Send due emails until the outbox is empty or `max_batches` is reached"""
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        if not self.email_service.is_configured:
+            print("Email credentials not configured")
+            return totals
+
+        db = SessionLocal()
+        try:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                payloads = self._claim_batch(db)
+                if not payloads:
+                    break
+                errors = list(self.executor.map(self._send, payloads))
+                self._record_results(db, payloads, errors, totals)
+                batches += 1
+        finally:
+            db.close()
+        return totals
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close_all()
+
+    def _claim_batch(self, db: Session) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.email_outbox_claim_timeout_seconds)
+        rows = db.query(EmailOutbox).filter(
+            or_(
+                and_(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+                and_(EmailOutbox.status == OutboxStatus.SENDING, EmailOutbox.claimed_at < stale_before)
+            )
+        ).order_by(
+            EmailOutbox.next_attempt_at
+        ).limit(
+            settings.email_outbox_batch_size
+        ).with_for_update(skip_locked=True).all()
+
+        # Copy what the sender threads need before the commit expires the rows
+        payloads = [
+            {
+                "id": row.id,
+                "recipient": row.recipient,
+                "subject": row.subject,
+                "body": row.body,
+                "html_body": row.html_body,
+                "attempts": row.attempts
+            }
+            for row in rows
+        ]
+        for row in rows:
+            row.status = OutboxStatus.SENDING
+            row.claimed_at = now
+        db.commit()
+        return payloads
+
+    def _send(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Send one email, returning an error message on failure"""
+        msg = self.email_service.build_message(
+            [payload["recipient"]], payload["subject"], payload["body"], payload["html_body"]
+        )
+        try:
+            with self.pool.connection() as server:
+                server.send_message(msg)
+            return None
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+
+    def _record_results(
+        self,
+        db: Session,
+        payloads: List[Dict[str, Any]],
+        errors: List[Optional[str]],
+        totals: Dict[str, int]
+    ):
+        now = datetime.utcnow()
+        mappings = []
+        for payload, error in zip(payloads, errors):
+            attempts = payload["attempts"] + 1
+            mapping = {"id": payload["id"], "attempts": attempts, "claimed_at": None}
+            if error is None:
+                mapping.update(status=OutboxStatus.SENT, sent_at=now, last_error=None)
+                totals["sent"] += 1
+            elif attempts >= settings.email_outbox_max_attempts:
+                mapping.update(status=OutboxStatus.FAILED, last_error=error)
+                totals["failed"] += 1
+            else:
+                delay = min(
+                    settings.email_outbox_retry_max_seconds,
+                    settings.email_outbox_retry_base_seconds * (2 ** (attempts - 1))
+                )
+                mapping.update(
+                    status=OutboxStatus.PENDING,
+                    last_error=error,
+                    next_attempt_at=now + timedelta(seconds=random.uniform(delay / 2, delay))
+                )
+                totals["retried"] += 1
+            mappings.append(mapping)
+
+        db.bulk_update_mappings(EmailOutbox, mappings)
+        db.commit()
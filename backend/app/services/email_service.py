@@ -1,7 +1,7 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.config import settings
 
 class EmailService:
@@ -11,54 +11,51 @@ class EmailService:
         self.username = settings.smtp_username
         self.password = settings.smtp_password
     
-    def send_email(
+    def build_message(
         self,
         to_emails: List[str],
         subject: str,
         body: str,
         html_body: Optional[str] = None,
         from_email: Optional[str] = None
-    ) -> bool:
-        """Send email to recipients"""
-        if not self.username or not self.password:
-            print("Email credentials not configured")
-            return False
+    ) -> MIMEMultipart:
+        """Build a multipart message with a plain text and optional HTML part"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = from_email or settings.smtp_from_email or self.username
+        msg['To'] = ', '.join(to_emails)
         
+        # Add text part
+        text_part = MIMEText(body, 'plain')
+        msg.attach(text_part)
+        
+        # Add HTML part if provided
+        if html_body:
+            html_part = MIMEText(html_body, 'html')
+            msg.attach(html_part)
+        
+        return msg
+    
+    @property
+    def is_configured(self) -> bool:
+        """Credentials are only required when the server needs authentication"""
+        return bool(self.username and self.password) or not settings.smtp_require_auth
+    
+    def connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=settings.smtp_timeout)
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = from_email or self.username
-            msg['To'] = ', '.join(to_emails)
-            
-            # Add text part
-            text_part = MIMEText(body, 'plain')
-            msg.attach(text_part)
-            
-            # Add HTML part if provided
-            if html_body:
-                html_part = MIMEText(html_body, 'html')
-                msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            if settings.smtp_use_tls:
                 server.starttls()
+            if self.username and self.password:
                 server.login(self.username, self.password)
-                server.send_message(msg)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Email sending error: {e}")
-            return False
+        except Exception:
+            server.close()
+            raise
+        return server
     
-    def send_lead_notification(
-        self,
-        to_emails: List[str],
-        lead_count: int,
-        campaign_name: str
-    ) -> bool:
-        """Send notification about new leads generated"""
+    def lead_notification_content(self, lead_count: int, campaign_name: str) -> Tuple[str, str, str]:
+        """Subject, text and HTML body for a new leads notification"""
         subject = f"New Leads Generated - {campaign_name}"
         body = f"""
         Hello,
@@ -83,15 +80,10 @@ class EmailService:
         </html>
         """
         
-        return self.send_email(to_emails, subject, body, html_body)
+        return subject, body, html_body
     
-    def send_lead_assignment_notification(
-        self,
-        to_email: str,
-        assignee_name: str,
-        lead_count: int
-    ) -> bool:
-        """Send notification about lead assignment"""
+    def lead_assignment_content(self, assignee_name: str, lead_count: int) -> Tuple[str, str]:
+        """Subject and text body for a lead assignment digest"""
         subject = f"New Leads Assigned to You"
         body = f"""
         Hello {assignee_name},
@@ -104,4 +96,4 @@ class EmailService:
         CRM System
         """
         
-        return self.send_email([to_email], subject, body)
\ No newline at end of file
+        return subject, body
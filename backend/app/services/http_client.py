@@ -0,0 +1,123 @@
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Tuple
+import httpcore
+import httpx
+from app.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+class CachingNetworkBackend(httpcore.SyncBackend):
+    """Sync network backend that caches DNS lookups for `dns_cache_ttl` seconds.
+
+    TLS still uses the original hostname for SNI and certificate checks, since
+    httpcore passes it separately when starting TLS.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._cache[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = self.resolve(host, port)
+        except OSError:
+            addresses = [host]
+
+        last_error = None
+        for address in addresses:
+            try:
+                return super().connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                last_error = e
+        # Cached addresses may be stale, forget them so the next call re-resolves
+        with self._lock:
+            self._cache.pop((host, port), None)
+        raise last_error
+
+class PooledTransport(httpx.HTTPTransport):
+    """HTTP transport whose connection pool resolves hosts through the DNS cache.
+
+    The pool is created with httpcore's `network_backend` option; request
+    handling and error mapping are inherited from httpx.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False, retries: int = 0):
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            retries=retries,
+            network_backend=CachingNetworkBackend(settings.dns_cache_ttl)
+        )
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide pooled HTTP client, created on first use.
+
+    Connections are kept alive and reused per host across sources, campaign
+    runs and threads. A new client is created after a fork so worker processes
+    never share sockets with their parent.
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            limits = httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry
+            )
+            http2 = settings.http2_enabled and HTTP2_AVAILABLE
+            _client = httpx.Client(
+                transport=PooledTransport(limits=limits, http2=http2, retries=1),
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+                timeout=settings.source_request_timeout,
+                follow_redirects=True
+            )
+            _client_pid = os.getpid()
+    return _client
+
+def close_http_client():
+    """Close pooled connections, used on application shutdown"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
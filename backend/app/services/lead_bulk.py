@@ -0,0 +1,256 @@
+import enum
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import insert, select, update, delete, literal, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import String
+from app.config import settings
+from app.models.lead import AutoLead, FinalLead, LeadStatus
+from app.models.tag import LeadTag, LeadTagAssignment
+from app.services.lead_rollup import LeadRollupService
+
+class new_uuid(FunctionElement):
+    """A random UUID string generated by the database, for set-based inserts"""
+    type = String()
+    inherit_cache = True
+
+@compiles(new_uuid)
+def _compile_new_uuid(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+@compiles(new_uuid, "mysql")
+def _compile_new_uuid_mysql(element, compiler, **kw):
+    return "UUID()"
+
+@compiles(new_uuid, "sqlite")
+def _compile_new_uuid_sqlite(element, compiler, **kw):
+    return (
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || "
+        "substr(hex(randomblob(2)), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+        "substr(hex(randomblob(2)), 2) || '-' || hex(randomblob(6)))"
+    )
+
+# Auto lead columns copied onto the final lead when it is approved
+FINALIZED_COLUMNS = [
+    "company_name", "website", "linkedin_url", "email", "phone", "address",
+    "industry", "employee_count", "revenue_range", "keywords_matched", "relevance_score",
+]
+
+LEAD_MODELS = {"auto": AutoLead, "final": FinalLead}
+
+def chunked(values: Sequence, size: Optional[int] = None) -> Iterator[List]:
+    """Split `values` into lists of at most `size` items, keeping IN lists bounded"""
+    size = size or settings.bulk_chunk_size
+    for start in range(0, len(values), size):
+        yield list(values[start:start + size])
+
+class LeadBulkService:
+    @staticmethod
+    def finalize_auto_leads(db: Session, lead_ids: List[str], approved_by: str) -> List[str]:
+        """Copy auto leads into final leads with set-based statements.
+
+        Each chunk locks the eligible rows, then runs one INSERT ... SELECT and
+        one UPDATE and commits. Leads that are missing or already approved are
+        skipped, so repeating a request does not create duplicates. Returns the
+        ids that were finalized.
+        """
+        finalized = []
+        for chunk in chunked(list(dict.fromkeys(lead_ids))):
+            pending = AutoLead.status.is_(None) | (AutoLead.status != LeadStatus.APPROVED)
+            eligible = [
+                lead_id for (lead_id,) in db.query(AutoLead.id).filter(
+                    AutoLead.id.in_(chunk), pending
+                ).with_for_update()
+            ]
+            if not eligible:
+                db.rollback()
+                continue
+
+            source = select(
+                new_uuid(),
+                AutoLead.id,
+                *[getattr(AutoLead, column) for column in FINALIZED_COLUMNS],
+                literal(approved_by),
+            ).where(AutoLead.id.in_(eligible))
+            with LeadRollupService.tracking(db, "auto", AutoLead.id.in_(eligible)), \
+                    LeadRollupService.tracking(db, "final", FinalLead.auto_lead_id.in_(eligible)):
+                db.execute(
+                    insert(FinalLead).from_select(
+                        ["id", "auto_lead_id", *FINALIZED_COLUMNS, "approved_by"], source
+                    )
+                )
+                db.execute(
+                    update(AutoLead).where(AutoLead.id.in_(eligible)).values(
+                        status=LeadStatus.APPROVED, is_selected=True, over_limit=False
+                    ).execution_options(synchronize_session=False)
+                )
+            db.commit()
+            finalized.extend(eligible)
+        return finalized
+
+    @staticmethod
+    def update_final_leads(
+        db: Session,
+        lead_ids: List[str],
+        updates: Dict[str, Any]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Apply the same field updates to many final leads, chunk by chunk.
+
+        Each chunk reads only the updated columns of the rows that would change,
+        locking them, then applies one UPDATE and commits. Returns the ids that
+        changed and a change log of the new value and the previous values with
+        their counts per field.
+        """
+        columns = [getattr(FinalLead, field) for field in updates]
+        old_values = {field: Counter() for field in updates}
+        updated = []
+        for chunk in chunked(list(dict.fromkeys(lead_ids))):
+            rows = db.query(FinalLead.id, *columns).filter(
+                FinalLead.id.in_(chunk),
+                or_(*[column.is_distinct_from(updates[column.key]) for column in columns])
+            ).with_for_update().all()
+            if not rows:
+                db.rollback()
+                continue
+
+            changed = [row[0] for row in rows]
+            for row in rows:
+                for field, value in zip(updates, row[1:]):
+                    if value != updates[field]:
+                        old_values[field][_loggable(value)] += 1
+            statement = update(FinalLead).where(FinalLead.id.in_(changed)).values(**updates) \
+                .execution_options(synchronize_session=False)
+            if "status" in updates:
+                with LeadRollupService.tracking(db, "final", FinalLead.id.in_(changed)):
+                    db.execute(statement)
+            else:
+                db.execute(statement)
+            db.commit()
+            updated.extend(changed)
+
+        changes = {
+            field: {
+                "new": _loggable(value),
+                "old": [{"value": old, "count": count} for old, count in old_values[field].most_common()]
+            }
+            for field, value in updates.items() if old_values[field]
+        }
+        return updated, changes
+
+    @staticmethod
+    def assign_tags(
+        db: Session,
+        lead_ids: List[str],
+        lead_type: str,
+        tag_ids: List[str]
+    ) -> List[Dict[str, str]]:
+        """Assign every tag to every lead, returning one result per (lead, tag).
+
+        New pairs are written with multi-row INSERT IGNORE so a pair assigned
+        concurrently is skipped by the unique constraint instead of failing.
+        """
+        lead_ids, tag_ids = list(dict.fromkeys(lead_ids)), list(dict.fromkeys(tag_ids))
+        known_leads, known_tags, existing = _tag_targets(db, lead_ids, lead_type, tag_ids)
+
+        items = []
+        new_rows = []
+        for lead_id in lead_ids:
+            for tag_id in tag_ids:
+                result = _missing_target(lead_id, tag_id, known_leads, known_tags)
+                if result is None:
+                    if (lead_id, tag_id) in existing:
+                        result = "already_assigned"
+                    else:
+                        result = "assigned"
+                        new_rows.append({
+                            "id": str(uuid.uuid4()),
+                            "lead_id": lead_id,
+                            "lead_type": lead_type,
+                            "tag_id": tag_id
+                        })
+                items.append({"lead_id": lead_id, "tag_id": tag_id, "result": result})
+
+        statement = insert(LeadTagAssignment).prefix_with(
+            "IGNORE", dialect="mysql"
+        ).prefix_with("OR IGNORE", dialect="sqlite")
+        for chunk in chunked(new_rows):
+            db.execute(statement, chunk)
+        db.commit()
+        return items
+
+    @staticmethod
+    def remove_tags(
+        db: Session,
+        lead_ids: List[str],
+        lead_type: str,
+        tag_ids: List[str]
+    ) -> List[Dict[str, str]]:
+        """Remove every tag from every lead with one DELETE ... IN per chunk of leads"""
+        lead_ids, tag_ids = list(dict.fromkeys(lead_ids)), list(dict.fromkeys(tag_ids))
+        known_leads, known_tags, existing = _tag_targets(db, lead_ids, lead_type, tag_ids)
+
+        items = []
+        for lead_id in lead_ids:
+            for tag_id in tag_ids:
+                result = _missing_target(lead_id, tag_id, known_leads, known_tags)
+                if result is None:
+                    result = "removed" if (lead_id, tag_id) in existing else "not_assigned"
+                items.append({"lead_id": lead_id, "tag_id": tag_id, "result": result})
+
+        if existing:
+            for chunk in chunked(sorted({lead_id for lead_id, _ in existing})):
+                db.execute(
+                    delete(LeadTagAssignment).where(
+                        LeadTagAssignment.lead_type == lead_type,
+                        LeadTagAssignment.lead_id.in_(chunk),
+                        LeadTagAssignment.tag_id.in_(tag_ids)
+                    ).execution_options(synchronize_session=False)
+                )
+            db.commit()
+        return items
+
+def _tag_targets(
+    db: Session,
+    lead_ids: List[str],
+    lead_type: str,
+    tag_ids: List[str]
+) -> Tuple[Set[str], Set[str], Set[Tuple[str, str]]]:
+    """Existing leads, existing tags and current (lead, tag) assignments"""
+    model = LEAD_MODELS[lead_type]
+    known_tags = {tag_id for (tag_id,) in db.query(LeadTag.id).filter(LeadTag.id.in_(tag_ids))}
+    known_leads = set()
+    existing = set()
+    for chunk in chunked(lead_ids):
+        known_leads.update(lead_id for (lead_id,) in db.query(model.id).filter(model.id.in_(chunk)))
+        existing.update(
+            (lead_id, tag_id) for lead_id, tag_id in db.query(
+                LeadTagAssignment.lead_id, LeadTagAssignment.tag_id
+            ).filter(
+                LeadTagAssignment.lead_type == lead_type,
+                LeadTagAssignment.lead_id.in_(chunk),
+                LeadTagAssignment.tag_id.in_(tag_ids)
+            )
+        )
+    return known_leads, known_tags, existing
+
+def _missing_target(lead_id: str, tag_id: str, known_leads: Set[str], known_tags: Set[str]) -> Optional[str]:
+    if lead_id not in known_leads:
+        return "lead_not_found"
+    if tag_id not in known_tags:
+        return "tag_not_found"
+    return None
+
+def _loggable(value: Any) -> Any:
+    """JSON-safe form of a column value for the activity log"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
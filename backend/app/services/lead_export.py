@@ -0,0 +1,217 @@
+import csv
+import gzip
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+from sqlalchemy.orm import Session, Query
+from app.config import settings
+from app.database import SessionLocal
+from app.models.export_job import ExportJob, ExportFormat, ExportStatus
+from app.models.lead import AutoLead, FinalLead
+from app.models.user import User
+from app.search import apply_lead_filters
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# (header, selected column, kind) for each export type
+AUTO_LEAD_EXPORT_COLUMNS = [
+    ('Company Name', AutoLead.company_name, 'text'),
+    ('Website', AutoLead.website, 'text'),
+    ('Email', AutoLead.email, 'text'),
+    ('Phone', AutoLead.phone, 'text'),
+    ('Industry', AutoLead.industry, 'text'),
+    ('Employee Count', AutoLead.employee_count, 'text'),
+    ('Relevance Score', AutoLead.relevance_score, 'score'),
+    ('Status', AutoLead.status, 'enum'),
+    ('Source', AutoLead.source, 'text'),
+    ('Created Date', AutoLead.created_at, 'datetime'),
+]
+
+FINAL_LEAD_EXPORT_COLUMNS = [
+    ('Company Name', FinalLead.company_name, 'text'),
+    ('Website', FinalLead.website, 'text'),
+    ('Email', FinalLead.email, 'text'),
+    ('Phone', FinalLead.phone, 'text'),
+    ('Industry', FinalLead.industry, 'text'),
+    ('Employee Count', FinalLead.employee_count, 'text'),
+    ('Priority', FinalLead.priority, 'enum'),
+    ('Status', FinalLead.status, 'enum'),
+    ('Relevance Score', FinalLead.relevance_score, 'score'),
+    ('Assigned To', User.full_name, 'text'),
+    ('Last Contact', FinalLead.last_contact_date, 'date'),
+    ('Next Follow Up', FinalLead.next_follow_up, 'date'),
+    ('Approved Date', FinalLead.approved_at, 'datetime'),
+]
+
+EXPORT_FILE_EXTENSIONS = {
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.CSV_GZIP: "csv.gz",
+    ExportFormat.ARROW: "arrow",
+}
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.CSV_GZIP: "application/gzip",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.file",
+}
+
+CSV_FORMATTERS: Dict[str, Callable[[Any], Any]] = {
+    'text': lambda value: value or '',
+    'score': lambda value: float(value or 0),
+    'enum': lambda value: value.value if value is not None else '',
+    'date': lambda value: value.strftime('%Y-%m-%d') if value else '',
+    'datetime': lambda value: value.strftime('%Y-%m-%d %H:%M:%S') if value else '',
+}
+
+# Columnar formats keep native types instead of pre-formatted strings
+COLUMNAR_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'text': lambda value: value,
+    'score': lambda value: float(value) if value is not None else None,
+    'enum': lambda value: value.value if value is not None else None,
+    'date': lambda value: value,
+    'datetime': lambda value: value,
+}
+
+def export_columns(lead_type: str) -> List[Tuple[str, Any, str]]:
+    return AUTO_LEAD_EXPORT_COLUMNS if lead_type == "auto" else FINAL_LEAD_EXPORT_COLUMNS
+
+def export_query(db: Session, lead_type: str) -> Query:
+    """Select only the exported columns, with the assignee name joined in SQL"""
+    columns = export_columns(lead_type)
+    query = db.query(*[column for _, column, _ in columns])
+    if lead_type != "auto":
+        # Assignee name is joined in SQL instead of lazy-loaded per row
+        query = query.outerjoin(User, FinalLead.assigned_to == User.id)
+    return query
+
+def csv_formatters(lead_type: str) -> List[Callable[[Any], Any]]:
+    return [CSV_FORMATTERS[kind] for _, _, kind in export_columns(lead_type)]
+
+def _arrow_schema(lead_type: str):
+    types = {
+        'text': pa.string(),
+        'score': pa.float64(),
+        'enum': pa.string(),
+        'date': pa.timestamp('us'),
+        'datetime': pa.timestamp('us'),
+    }
+    return pa.schema([(header, types[kind]) for header, _, kind in export_columns(lead_type)])
+
+class _CsvGzipWriter:
+    def __init__(self, path: str, lead_type: str):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.formatters = csv_formatters(lead_type)
+        self.writer.writerow([header for header, _, _ in export_columns(lead_type)])
+
+    def write(self, rows: List[Tuple]):
+        self.writer.writerows(
+            [formatter(value) for formatter, value in zip(self.formatters, row)] for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+class _ArrowWriter:
+    """Writes each chunk as one Parquet row group or one Arrow IPC record batch"""
+
+    def __init__(self, path: str, lead_type: str, export_format: ExportFormat):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for Parquet and Arrow exports")
+        self.schema = _arrow_schema(lead_type)
+        self.converters = [COLUMNAR_CONVERTERS[kind] for _, _, kind in export_columns(lead_type)]
+        if export_format == ExportFormat.PARQUET:
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            options = pa_ipc.IpcWriteOptions(compression="zstd")
+            self.writer = pa_ipc.new_file(path, self.schema, options=options)
+
+    def write(self, rows: List[Tuple]):
+        columns = [
+            [converter(row[i]) for row in rows]
+            for i, converter in enumerate(self.converters)
+        ]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+def _open_writer(path: str, lead_type: str, export_format: ExportFormat):
+    if export_format == ExportFormat.CSV_GZIP:
+        return _CsvGzipWriter(path, lead_type)
+    return _ArrowWriter(path, lead_type, export_format)
+
+def run_export_job(job_id: str):
+    """Write a lead export file in chunks, recording progress on the job row.
+
+    The lead rows are streamed on their own session because a server-side
+    cursor must be fully read before the same connection can run other
+    statements; job progress is committed through a second session.
+    """
+    db = SessionLocal()
+    stream_db = SessionLocal()
+    writer = None
+    try:
+        job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+        if not job:
+            print(f"Export job {job_id} not found")
+            return None
+
+        os.makedirs(settings.export_dir, exist_ok=True)
+        path = os.path.join(settings.export_dir, f"{job.id}.{EXPORT_FILE_EXTENSIONS[job.format]}")
+        lead_type = job.lead_type
+        model = AutoLead if lead_type == "auto" else FinalLead
+
+        query, _ = apply_lead_filters(stream_db, export_query(stream_db, lead_type), model, **(job.filters or {}))
+
+        job.status = ExportStatus.RUNNING
+        job.file_path = path
+        job.total_rows = query.order_by(None).count()
+        db.commit()
+
+        writer = _open_writer(path, lead_type, job.format)
+        chunk_size = settings.export_chunk_rows
+        rows_written = 0
+        chunk = []
+        for row in query.execution_options(stream_results=True, yield_per=chunk_size):
+            chunk.append(tuple(row))
+            if len(chunk) >= chunk_size:
+                writer.write(chunk)
+                rows_written += len(chunk)
+                chunk = []
+                job.rows_written = rows_written
+                db.commit()
+        if chunk or rows_written == 0:
+            writer.write(chunk)
+            rows_written += len(chunk)
+        writer.close()
+        writer = None
+
+        job.rows_written = rows_written
+        job.file_size = os.path.getsize(path)
+        job.status = ExportStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        db.commit()
+        return {"export_job_id": job_id, "rows_written": rows_written}
+
+    except Exception as e:
+        print(f"Export job {job_id} failed: {e}")
+        db.rollback()
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        db.query(ExportJob).filter(ExportJob.id == job_id).update(
+            {"status": ExportStatus.FAILED, "error": str(e)}
+        )
+        db.commit()
+        raise
+    finally:
+        stream_db.close()
+        db.close()
@@ -1,16 +1,23 @@
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from sentence_transformers import SentenceTransformer
 import spacy
 from fake_useragent import UserAgent
-import time
-import random
 from app.config import settings
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, SourceRateLimiter, retry_with_backoff
+from app.services.http_client import get_http_client
+import time
 
 class LeadGenerationService:
+    SOURCES = ["duckduckgo", "opencorporates", "google_places"]
+    
     def __init__(self):
         self.ua = UserAgent()
+        self.breakers = {source: CircuitBreaker(source) for source in self.SOURCES}
+        self.rate_limiters = {source: SourceRateLimiter(source) for source in self.SOURCES}
         # Load lightweight models for CPU processing
         try:
             self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
@@ -19,7 +26,40 @@ class LeadGenerationService:
             self.sentence_model = None
             self.nlp = None
     
-    def search_duckduckgo(self, query: str, region: str = "India") -> List[Dict[str, Any]]:
+    def _request_timeout(self, deadline: Optional[Deadline] = None) -> float:
+        """Per-request timeout, shortened to whatever is left of the run deadline"""
+        if deadline is None:
+            return settings.source_request_timeout
+        return deadline.timeout(settings.source_request_timeout)
+    
+    def _get(self, source: str, url: str, deadline: Optional[Deadline] = None, **kwargs) -> httpx.Response:
+        """GET from a lead source through its circuit breaker, retrying transient errors"""
+        breaker = self.breakers[source]
+        allowed, probe = breaker.allow_request()
+        if not allowed:
+            raise CircuitOpenError(f"circuit open, skipping {source}")
+        
+        def attempt() -> httpx.Response:
+            self.rate_limiters[source].wait(deadline)
+            response = get_http_client().get(url, timeout=self._request_timeout(deadline), **kwargs)
+            response.raise_for_status()
+            return response
+        
+        started = time.monotonic()
+        try:
+            response = retry_with_backoff(attempt, deadline)
+        except Exception as e:
+            # Running out of budget says nothing about the source's health
+            if isinstance(e, DeadlineExceeded) or (deadline and deadline.expired):
+                if probe:
+                    breaker.release_probe()
+                raise
+            breaker.record_failure(time.monotonic() - started, probe)
+            raise
+        breaker.record_success(time.monotonic() - started, probe)
+        return response
+    
+    def search_duckduckgo(self, query: str, region: str = "India", deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Search DuckDuckGo for companies matching the query"""
         try:
             search_query = f"{query} companies {region}"
@@ -29,18 +69,17 @@ class LeadGenerationService:
                 'User-Agent': self.ua.random,
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            response = self._get('duckduckgo', url, deadline, headers=headers)
             
             soup = BeautifulSoup(response.content, 'html.parser')
             results = []
             
             # Parse DuckDuckGo results
             for result in soup.find_all('div', class_='result')[:10]:  # Limit to 10 results
+                if deadline and deadline.expired:
+                    break
                 title_elem = result.find('a', class_='result__a')
                 snippet_elem = result.find('div', class_='result__snippet')
                 
@@ -60,7 +99,7 @@ class LeadGenerationService:
             print(f"DuckDuckGo search error: {e}")
             return []
     
-    def search_opencorporates(self, query: str, region: str = "India") -> List[Dict[str, Any]]:
+    def search_opencorporates(self, query: str, region: str = "India", deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Search OpenCorporates API for company data"""
         if not settings.opencorporates_api_key:
             return []
@@ -74,8 +113,7 @@ class LeadGenerationService:
                 'per_page': 10
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get('opencorporates', url, deadline, params=params)
             data = response.json()
             
             results = []
@@ -96,7 +134,7 @@ class LeadGenerationService:
             print(f"OpenCorporates search error: {e}")
             return []
     
-    def search_google_places(self, query: str, region: str = "India") -> List[Dict[str, Any]]:
+    def search_google_places(self, query: str, region: str = "India", deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Search Google Places API for business data"""
         if not settings.google_maps_api_key:
             return []
@@ -109,8 +147,7 @@ class LeadGenerationService:
                 'type': 'establishment'
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get('google_places', url, deadline, params=params)
             data = response.json()
             
             results = []
@@ -130,8 +167,17 @@ class LeadGenerationService:
             print(f"Google Places search error: {e}")
             return []
     
-    def calculate_relevance_score(self, company_data: Dict[str, Any], keywords: List[str]) -> float:
-        """Calculate relevance score using keyword matching and semantic similarity"""
+    def calculate_relevance_score(
+        self,
+        company_data: Dict[str, Any],
+        keywords: List[str],
+        deadline: Optional[Deadline] = None
+    ) -> float:
+        """Calculate relevance score using keyword matching and semantic similarity.
+
+        Past the deadline the embedding step is skipped and only the keyword
+        score is returned.
+        """
         if not keywords:
             return 0.0
         
@@ -156,7 +202,7 @@ class LeadGenerationService:
         
         # Semantic similarity score (0.0 to 0.4)
         semantic_score = 0.0
-        if self.sentence_model:
+        if self.sentence_model and not (deadline and deadline.expired):
             try:
                 keywords_text = ' '.join(keywords)
                 embeddings = self.sentence_model.encode([company_text, keywords_text])
@@ -207,49 +253,49 @@ class LeadGenerationService:
             }
         }
     
-    def generate_leads(self, keywords: List[str], region: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """Generate leads from multiple sources"""
-        all_leads = []
-        
+    def generate_leads_stream(
+        self,
+        keywords: List[str],
+        region: str,
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield scored, de-duplicated leads as soon as each source returns"""
         # Search query combining keywords
         query = ' '.join(keywords[:3])  # Use first 3 keywords to avoid too long queries
         
-        # Search DuckDuckGo
-        duckduckgo_leads = self.search_duckduckgo(query, region)
-        all_leads.extend(duckduckgo_leads)
-        
-        # Add delay to avoid rate limiting
-        time.sleep(random.uniform(1, 3))
-        
-        # Search OpenCorporates
-        opencorporates_leads = self.search_opencorporates(query, region)
-        all_leads.extend(opencorporates_leads)
-        
-        # Add delay
-        time.sleep(random.uniform(1, 3))
-        
-        # Search Google Places
-        google_leads = self.search_google_places(query, region)
-        all_leads.extend(google_leads)
+        sources = [
+            self.search_duckduckgo,
+            self.search_opencorporates,
+            self.search_google_places,
+        ]
         
-        # Remove duplicates based on company name
         seen_companies = set()
-        unique_leads = []
         
-        for lead in all_leads:
-            company_name = lead.get('company_name', '').lower().strip()
-            if company_name and company_name not in seen_companies:
-                seen_companies.add(company_name)
-                
-                # Calculate relevance score
-                lead['relevance_score'] = self.calculate_relevance_score(lead, keywords)
-                lead['keywords_matched'] = self._find_matched_keywords(lead, keywords)
-                
-                unique_leads.append(lead)
-        
-        # Sort by relevance score and return top results
-        unique_leads.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-        return unique_leads[:limit]
+        # Sources hit different providers, so query them concurrently
+        executor = ThreadPoolExecutor(max_workers=len(sources))
+        futures = [executor.submit(search, query, region, deadline) for search in sources]
+        try:
+            for future in as_completed(futures, timeout=deadline.remaining() if deadline else None):
+                for lead in future.result():
+                    if deadline and deadline.expired:
+                        print("Lead generation deadline reached, returning leads scored so far")
+                        return
+                    
+                    # Remove duplicates based on company name
+                    company_name = lead.get('company_name', '').lower().strip()
+                    if not company_name or company_name in seen_companies:
+                        continue
+                    seen_companies.add(company_name)
+                    
+                    # Calculate relevance score
+                    lead['relevance_score'] = self.calculate_relevance_score(lead, keywords, deadline)
+                    lead['keywords_matched'] = self._find_matched_keywords(lead, keywords)
+                    
+                    yield lead
+        except FuturesTimeoutError:
+            print("Lead generation deadline reached, cancelling sources still in flight")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def _find_matched_keywords(self, lead_data: Dict[str, Any], keywords: List[str]) -> List[str]:
         """Find which keywords match the lead data"""
@@ -0,0 +1,132 @@
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator, Optional
+from sqlalchemy import select, insert, delete, func, false, literal, literal_column
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+from app.database import SessionLocal
+from app.models.lead import AutoLead, FinalLead, LeadStatus
+from app.models.report import LeadDailyCount
+from app.report_cache import report_cache, LEADS
+
+ROLLUP_COLUMNS = ["day", "lead_type", "campaign_id", "source", "status", "lead_count"]
+
+def _count_select(lead_type: str, condition: Optional[ColumnElement] = None):
+    """Rollup rows for the leads matching `condition`, grouped like lead_daily_counts"""
+    if lead_type == "auto":
+        model, default_status = AutoLead, LeadStatus.GENERATED
+    else:
+        model, default_status = FinalLead, LeadStatus.APPROVED
+
+    # Defaults are inlined so the grouped expressions match under ONLY_FULL_GROUP_BY
+    keys = [
+        func.date(model.created_at),
+        func.coalesce(AutoLead.campaign_id, literal_column("''")),
+        func.coalesce(AutoLead.source, literal_column("''")),
+        func.coalesce(model.status, literal_column(f"'{default_status.name}'", model.status.type)),
+    ]
+    statement = select(keys[0], literal(lead_type), *keys[1:], func.count(model.id))
+    if model is FinalLead:
+        # Final leads report under the campaign and source of their auto lead
+        statement = statement.select_from(FinalLead).outerjoin(AutoLead, FinalLead.auto_lead_id == AutoLead.id)
+    else:
+        # Leads outside their run's top limit are kept for reference but not reported
+        statement = statement.where(AutoLead.over_limit == false())
+    if condition is not None:
+        statement = statement.where(condition)
+    return statement.group_by(*keys)
+
+def _upsert(db: Session, rows):
+    dialect = db.get_bind().dialect.name
+    table = LeadDailyCount.__table__
+    if dialect == "mysql":
+        statement = mysql.insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(lead_count=table.c.lead_count + statement.inserted.lead_count)
+    else:
+        statement = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[column for column in table.primary_key.columns],
+            set_={"lead_count": table.c.lead_count + statement.excluded.lead_count}
+        )
+    db.execute(statement)
+
+class LeadRollupService:
+    """Keeps lead_daily_counts in step with auto_leads and final_leads.
+
+    Every write path that creates, deletes or changes the status of leads
+    reports it here in the same transaction; deltas are applied with an
+    upsert that adds to the stored count, so concurrent writers do not
+    overwrite each other. `rebuild` recomputes the table from scratch.
+    """
+
+    @staticmethod
+    def counts(db: Session, lead_type: str, condition: ColumnElement) -> Counter:
+        """Rollup keys and counts of the leads matching `condition`"""
+        counts = Counter()
+        for day, _, campaign_id, source, lead_status, count in db.execute(_count_select(lead_type, condition)):
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            counts[(day, lead_type, campaign_id, source, lead_status)] += count
+        return counts
+
+    @staticmethod
+    def apply(db: Session, deltas: Counter):
+        # Sorted so concurrent writers lock rollup rows in the same order
+        rows = [
+            dict(zip(ROLLUP_COLUMNS, (*key, delta)))
+            for key, delta in sorted(deltas.items(), key=lambda item: (item[0][:4], item[0][4].value))
+            if delta
+        ]
+        if rows:
+            _upsert(db, rows)
+            report_cache.mark_changed(db, LEADS)
+
+    @staticmethod
+    def record_added(db: Session, lead_type: str, condition: ColumnElement):
+        """Count newly inserted (and flushed) leads"""
+        LeadRollupService.apply(db, LeadRollupService.counts(db, lead_type, condition))
+
+    @staticmethod
+    def record_removed(db: Session, lead_type: str, condition: ColumnElement):
+        """Uncount leads that are about to be deleted"""
+        counts = LeadRollupService.counts(db, lead_type, condition)
+        LeadRollupService.apply(db, Counter({key: -count for key, count in counts.items()}))
+
+    @staticmethod
+    @contextmanager
+    def tracking(db: Session, lead_type: str, condition: ColumnElement) -> Iterator[None]:
+        """Apply the difference in counts of the matching leads made inside the block"""
+        before = LeadRollupService.counts(db, lead_type, condition)
+        yield
+        db.flush()
+        deltas = LeadRollupService.counts(db, lead_type, condition)
+        deltas.subtract(before)
+        LeadRollupService.apply(db, deltas)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute lead_daily_counts from the lead tables in one transaction"""
+        db.execute(delete(LeadDailyCount))
+        for lead_type in ("auto", "final"):
+            db.execute(insert(LeadDailyCount).from_select(ROLLUP_COLUMNS, _count_select(lead_type)))
+        report_cache.mark_changed(db, LEADS)
+        db.commit()
+        return db.query(func.count()).select_from(LeadDailyCount).scalar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reporting rollup maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Backfill lead_daily_counts from auto_leads and final_leads")
+    parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt lead_daily_counts: {LeadRollupService.rebuild(db)} rows")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.lead import AutoLead, LeadStatus
+from app.services.lead_bulk import chunked
+from app.services.lead_rollup import LeadRollupService
+from app.config import settings
+import uuid
+
+class StreamingLeadWriter:
+    """Persist scored leads for a campaign run in small batches.
+
+    Leads are committed as soon as a batch fills up so reviewers can see them
+    while the run is still going. Each row gets a provisional rank based on the
+    scores seen so far; `finalize` assigns the final ranks and applies the
+    top-`limit` cutoff by flagging the other rows `over_limit` instead of
+    deleting them; flagged leads keep their status and are left out of reports.
+    Leads a reviewer already acted on during the run are never flagged.
+    """
+
+    def __init__(self, db: Session, campaign_id: str, batch_size: int = None):
+        self.db = db
+        self.campaign_id = campaign_id
+        self.batch_size = batch_size or settings.lead_stream_batch_size
+        self._pending: List[AutoLead] = []
+        self._pending_keys: List[Tuple[float, str]] = []
+        # Ascending negated scores, used to compute provisional ranks
+        self._scores: List[float] = []
+        # (score, lead id) for every row persisted in this run
+        self._persisted: List[Tuple[float, str]] = []
+
+    def add(self, lead_data: Dict[str, Any]):
+        """Queue a scored lead and flush once the batch is full"""
+        score = float(lead_data.get('relevance_score', 0.0))
+        rank = bisect_left(self._scores, -score) + 1
+        insort(self._scores, -score)
+
+        # Assign the id up front so it can be tracked without a refresh
+        auto_lead = AutoLead(
+            id=str(uuid.uuid4()),
+            campaign_id=self.campaign_id,
+            company_name=lead_data.get('company_name', ''),
+            website=lead_data.get('website'),
+            email=lead_data.get('email'),
+            phone=lead_data.get('phone'),
+            address=lead_data.get('address'),
+            industry=lead_data.get('industry'),
+            keywords_matched=lead_data.get('keywords_matched', []),
+            relevance_score=score,
+            rank=rank,
+            source=lead_data.get('source', 'unknown'),
+            raw_data=lead_data.get('raw_data')
+        )
+        self._pending.append(auto_lead)
+        self._pending_keys.append((score, auto_lead.id))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Commit pending leads so they become visible immediately"""
+        if not self._pending:
+            return
+
+        self.db.add_all(self._pending)
+        self.db.flush()
+        LeadRollupService.record_added(self.db, "auto", AutoLead.id.in_([lead.id for lead in self._pending]))
+        self.db.commit()
+
+        # Drop ORM instances so memory stays bounded for large runs
+        for auto_lead in self._pending:
+            self.db.expunge(auto_lead)
+        self._persisted.extend(self._pending_keys)
+        self._pending = []
+        self._pending_keys = []
+
+    def finalize(self, limit: int) -> int:
+        """Assign final ranks and flag leads outside the top `limit`"""
+        self.flush()
+
+        ordered = sorted(self._persisted, key=lambda item: item[0], reverse=True)
+        mappings = [{'id': lead_id, 'rank': position} for position, (_, lead_id) in enumerate(ordered, start=1)]
+        if mappings:
+            self.db.bulk_update_mappings(AutoLead, mappings)
+            self.db.commit()
+
+        # Only leads still untouched are flagged; the rows are locked first so a
+        # lead approved or rejected while the run streamed keeps counting in reports
+        for chunk in chunked([lead_id for _, lead_id in ordered[limit:]]):
+            untouched = [
+                lead_id for (lead_id,) in self.db.query(AutoLead.id).filter(
+                    AutoLead.id.in_(chunk), AutoLead.status == LeadStatus.GENERATED
+                ).with_for_update()
+            ]
+            if untouched:
+                with LeadRollupService.tracking(self.db, "auto", AutoLead.id.in_(untouched)):
+                    self.db.execute(
+                        update(AutoLead).where(AutoLead.id.in_(untouched)).values(
+                            over_limit=True
+                        ).execution_options(synchronize_session=False)
+                    )
+            self.db.commit()
+
+        return min(len(ordered), limit)
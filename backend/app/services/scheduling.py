@@ -0,0 +1,46 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Optional
+
+RECURRENCE_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "biweekly": timedelta(weeks=2),
+}
+
+def _add_months(value: datetime, months: int) -> datetime:
+    """Add calendar months, clamping the day to the end of shorter months"""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+def next_run_at(previous: datetime, pattern: Optional[str], now: datetime) -> Optional[datetime]:
+    """Next occurrence of a recurring campaign strictly after `now`.
+
+    Occurrences are anchored on the previous `scheduled_at`, so a run that
+    started late does not drift the schedule. Returns None for unknown patterns.
+    """
+    if not pattern:
+        return None
+    pattern = pattern.strip().lower()
+
+    if pattern in RECURRENCE_INTERVALS:
+        interval = RECURRENCE_INTERVALS[pattern]
+        if previous > now:
+            return previous + interval
+        missed = (now - previous) // interval + 1
+        return previous + interval * missed
+
+    if pattern in ("monthly", "quarterly"):
+        step = 1 if pattern == "monthly" else 3
+        months = step
+        candidate = _add_months(previous, months)
+        while candidate <= now:
+            months += step
+            candidate = _add_months(previous, months)
+        return candidate
+
+    return None
@@ -0,0 +1,242 @@
+import threading
+from functools import reduce
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.tag import LeadTagAssignment
+from app.redis_client import get_redis
+
+try:
+    from pyroaring import BitMap
+except ImportError:
+    BitMap = None
+
+class _IntBitMap:
+    """Uncompressed fallback with the subset of the pyroaring BitMap API used here"""
+    __slots__ = ("bits",)
+
+    def __init__(self, ordinals: Iterable[int] = ()):
+        ordinals = list(ordinals)
+        buffer = bytearray((max(ordinals) // 8 + 1) if ordinals else 0)
+        for ordinal in ordinals:
+            buffer[ordinal >> 3] |= 1 << (ordinal & 7)
+        self.bits = int.from_bytes(buffer, "little")
+
+    def add(self, ordinal: int):
+        self.bits |= 1 << ordinal
+
+    def discard(self, ordinal: int):
+        self.bits &= ~(1 << ordinal)
+
+    def __and__(self, other: "_IntBitMap") -> "_IntBitMap":
+        result = _IntBitMap()
+        result.bits = self.bits & other.bits
+        return result
+
+    def __or__(self, other: "_IntBitMap") -> "_IntBitMap":
+        result = _IntBitMap()
+        result.bits = self.bits | other.bits
+        return result
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __iter__(self):
+        bits = bin(self.bits)[:1:-1]
+        return (ordinal for ordinal, bit in enumerate(bits) if bit == "1")
+
+def _new_bitmap(ordinals: Iterable[int] = ()):
+    return BitMap(ordinals) if BitMap is not None else _IntBitMap(ordinals)
+
+class _LeadTypeIndex:
+    """Bitmaps of ordinal lead ids per tag for one lead type"""
+
+    def __init__(self):
+        self.ordinals: Dict[str, int] = {}
+        self.lead_ids: List[str] = []
+        self.bitmaps: Dict[str, object] = {}
+
+    def ordinal(self, lead_id: str) -> int:
+        ordinal = self.ordinals.get(lead_id)
+        if ordinal is None:
+            ordinal = len(self.lead_ids)
+            self.ordinals[lead_id] = ordinal
+            self.lead_ids.append(lead_id)
+        return ordinal
+
+# Bumped by every worker that changes tag assignments
+VERSION_KEY = "tags:index:version"
+
+Pairs = List[Tuple[str, str, str]]
+
+def _current_version() -> Optional[int]:
+    try:
+        return int(get_redis().get(VERSION_KEY) or 0)
+    except RedisError:
+        return None
+
+def _bump_version() -> Optional[int]:
+    try:
+        return get_redis().incr(VERSION_KEY)
+    except RedisError as e:
+        print(f"Tag index version error: {e}")
+        return None
+
+def _load(db: Session) -> Dict[str, _LeadTypeIndex]:
+    indexes: Dict[str, _LeadTypeIndex] = {}
+    ordinals_by_tag: Dict[Tuple[str, str], List[int]] = {}
+    rows = db.query(
+        LeadTagAssignment.lead_type, LeadTagAssignment.lead_id, LeadTagAssignment.tag_id
+    ).execution_options(yield_per=10000)
+    for lead_type, lead_id, tag_id in rows:
+        index = indexes.setdefault(lead_type, _LeadTypeIndex())
+        ordinals_by_tag.setdefault((lead_type, tag_id), []).append(index.ordinal(lead_id))
+    for (lead_type, tag_id), ordinals in ordinals_by_tag.items():
+        indexes[lead_type].bitmaps[tag_id] = _new_bitmap(ordinals)
+    return indexes
+
+def _add(indexes: Dict[str, _LeadTypeIndex], pairs: Pairs):
+    for lead_type, lead_id, tag_id in pairs:
+        index = indexes.setdefault(lead_type, _LeadTypeIndex())
+        bitmap = index.bitmaps.get(tag_id)
+        if bitmap is None:
+            bitmap = index.bitmaps[tag_id] = _new_bitmap()
+        bitmap.add(index.ordinal(lead_id))
+
+def _remove(indexes: Dict[str, _LeadTypeIndex], pairs: Pairs):
+    for lead_type, lead_id, tag_id in pairs:
+        index = indexes.get(lead_type)
+        if index is None or lead_id not in index.ordinals or tag_id not in index.bitmaps:
+            continue
+        index.bitmaps[tag_id].discard(index.ordinals[lead_id])
+
+class TagBitmapIndex:
+    """In-process index from tags to the leads carrying them.
+
+    Only tagged leads get an ordinal, so the bitmaps stay dense and small.
+    Writes made by this process are applied incrementally and bump a version
+    counter in Redis. When a lookup sees that another worker moved the
+    counter, the index is rebuilt from `lead_tag_assignments` in a background
+    thread; lookups keep using the current index until the new one is
+    swapped in, with the changes made during the build replayed onto it.
+    A process whose index was never built builds it on the first lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for the whole of a build, so at most one runs at a time
+        self._build_lock = threading.Lock()
+        self._built = False
+        self._indexes: Dict[str, _LeadTypeIndex] = {}
+        self._version: Optional[int] = None
+        # Changes applied while a build runs, replayed onto its result,
+        # and the version the rebuilt index will be at
+        self._pending: Optional[List[Tuple[Callable, Pairs]]] = None
+        self._pending_version: Optional[int] = None
+
+    def rebuild(self, db: Session):
+        """Load every assignment into fresh bitmaps, replacing the index"""
+        with self._build_lock:
+            self._build(db, _current_version())
+
+    def ensure_fresh(self, db: Session):
+        """Build the index if it was never built, otherwise refresh it in the
+        background if another worker changed tag assignments"""
+        if not self._built:
+            # Nothing to answer from yet, so build on the caller's session
+            with self._build_lock:
+                if not self._built:
+                    self._build(db, _current_version())
+            return
+
+        version = _current_version()
+        if version is None or version == self._version:
+            return
+        if not self._build_lock.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._rebuild_in_background, args=(version,), name="tag-index-rebuild", daemon=True
+        ).start()
+
+    def _rebuild_in_background(self, version: int):
+        db = SessionLocal()
+        try:
+            self._build(db, version)
+        except Exception as e:
+            print(f"Tag index rebuild error: {e}")
+        finally:
+            db.close()
+            self._build_lock.release()
+
+    def _build(self, db: Session, version: Optional[int]):
+        with self._lock:
+            self._pending = []
+            self._pending_version = version
+        try:
+            indexes = _load(db)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for operation, pairs in self._pending:
+                operation(indexes, pairs)
+            self._indexes = indexes
+            self._version = self._pending_version
+            self._pending = None
+            self._built = True
+
+    def add(self, pairs: Iterable[Tuple[str, str, str]]):
+        """Record (lead_type, lead_id, tag_id) assignments committed by this process"""
+        self._apply(_add, list(pairs))
+
+    def remove(self, pairs: Iterable[Tuple[str, str, str]]):
+        """Forget (lead_type, lead_id, tag_id) assignments committed by this process"""
+        self._apply(_remove, list(pairs))
+
+    def _apply(self, operation: Callable, pairs: Pairs):
+        if not pairs:
+            return
+        version = _bump_version()
+        with self._lock:
+            operation(self._indexes, pairs)
+            if self._pending is not None:
+                self._pending.append((operation, pairs))
+                if version is not None and self._pending_version == version - 1:
+                    self._pending_version = version
+            # Still current unless another worker wrote in between
+            if version is not None and self._version == version - 1:
+                self._version = version
+
+    def lead_ids(
+        self,
+        db: Session,
+        lead_type: str,
+        all_tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None
+    ) -> List[str]:
+        """Ids of leads having every tag in `all_tags` and at least one of `any_tags`"""
+        self.ensure_fresh(db)
+        with self._lock:
+            index = self._indexes.get(lead_type)
+            if index is None:
+                return []
+            empty = _new_bitmap()
+            selected = []
+            if all_tags:
+                # Intersect the smallest bitmaps first
+                bitmaps = sorted((index.bitmaps.get(tag_id, empty) for tag_id in all_tags), key=len)
+                selected.append(reduce(lambda left, right: left & right, bitmaps))
+            if any_tags:
+                selected.append(reduce(
+                    lambda left, right: left | right,
+                    (index.bitmaps.get(tag_id, empty) for tag_id in any_tags)
+                ))
+            if not selected:
+                return []
+            matches = reduce(lambda left, right: left & right, selected)
+            return [index.lead_ids[ordinal] for ordinal in matches]
+
+tag_index = TagBitmapIndex()
@@ -1,22 +1,53 @@
-from celery import Celery
+from celery_app import celery_app
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import task_prerun, task_postrun
+from sqlalchemy import update, func
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
+from app.redis_client import get_redis
 from app.models.campaign import Campaign, CampaignStatus
-from app.models.lead import AutoLead
 from app.services.lead_generation import LeadGenerationService
+from app.services.lead_writer import StreamingLeadWriter
+from app.services.deadline import Deadline
 from app.services.email_service import EmailService
-from datetime import datetime
+from app.services.email_outbox import EmailOutboxService, OutboxSender
+from app.services.scheduling import next_run_at
+from app.services.lead_export import run_export_job
+from app.services.activity_archive import run_retention
+from app.config import settings
+from app.query_stats import start_tracking, stop_tracking
+from datetime import datetime, timedelta
+from typing import Optional
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
-celery_app = Celery("crm_tasks")
+# SQL statement counts per task run, keyed by task id
+_query_tracking = {}
+
+@task_prerun.connect
+def _start_query_tracking(task_id=None, task=None, **kwargs):
+    _query_tracking[task_id] = start_tracking(f"task {task.name}")
+
+@task_postrun.connect
+def _stop_query_tracking(task_id=None, task=None, **kwargs):
+    token = _query_tracking.pop(task_id, None)
+    if token is None:
+        return
+    stats = stop_tracking(token)
+    logger.info(f"Task {task.name} ran {stats.count} SQL statements in {stats.total_ms:.0f} ms")
 
 @celery_app.task
-def generate_leads_for_campaign(campaign_id: str):
+def generate_leads_for_campaign(campaign_id: str, scheduled_for: Optional[str] = None):
     """Background task to generate leads for a campaign"""
     db = SessionLocal()
     try:
+        if scheduled_for and not _start_scheduled_run(db, campaign_id, scheduled_for):
+            logger.info(f"Skipping stale or duplicate scheduled run of campaign {campaign_id}")
+            return {"campaign_id": campaign_id, "skipped": True}
+        
         campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
         if not campaign:
             logger.error(f"Campaign {campaign_id} not found")
@@ -27,138 +58,245 @@ def generate_leads_for_campaign(campaign_id: str):
         # Initialize lead generation service
         lead_service = LeadGenerationService()
         
-        # Generate leads
+        # Persist leads in small batches as they are scored
         region_name = campaign.region.name if campaign.region else "India"
-        generated_leads = lead_service.generate_leads(
-            keywords=campaign.keywords,
-            region=region_name,
-            limit=20
-        )
+        deadline = Deadline(campaign.run_timeout_seconds or settings.campaign_run_timeout_seconds)
+        writer = StreamingLeadWriter(db, campaign.id)
+        try:
+            for lead_data in lead_service.generate_leads_stream(
+                keywords=campaign.keywords,
+                region=region_name,
+                deadline=deadline
+            ):
+                writer.add(lead_data)
+        except SoftTimeLimitExceeded:
+            logger.warning(f"Soft time limit hit for campaign {campaign.name}, keeping leads scored so far")
         
-        # Save leads to database
-        saved_count = 0
-        for lead_data in generated_leads:
-            auto_lead = AutoLead(
-                campaign_id=campaign.id,
-                company_name=lead_data.get('company_name', ''),
-                website=lead_data.get('website'),
-                email=lead_data.get('email'),
-                phone=lead_data.get('phone'),
-                address=lead_data.get('address'),
-                industry=lead_data.get('industry'),
-                keywords_matched=lead_data.get('keywords_matched', []),
-                relevance_score=lead_data.get('relevance_score', 0.0),
-                source=lead_data.get('source', 'unknown'),
-                raw_data=lead_data.get('raw_data')
-            )
-            
-            db.add(auto_lead)
-            saved_count += 1
+        saved_count = writer.finalize(settings.campaign_lead_limit)
         
-        # Update campaign
+        # Update campaign, queueing the next occurrence of recurring campaigns
         campaign.leads_generated = saved_count
-        campaign.status = CampaignStatus.COMPLETED
+        if not _schedule_next_occurrence(campaign):
+            campaign.status = CampaignStatus.COMPLETED
+        
+        # Queue the admin notification in the same transaction as the update
+        from app.models.user import User, UserRole
+        admin_emails = [email for (email,) in db.query(User.email).filter(
+            User.role == UserRole.ADMIN,
+            User.is_active == True
+        )]
+        subject, body, html_body = EmailService().lead_notification_content(saved_count, campaign.name)
+        run_key = scheduled_for or generate_leads_for_campaign.request.id or str(uuid.uuid4())
+        EmailOutboxService.enqueue(
+            db, admin_emails, subject, body, html_body,
+            dedup_key=f"leads_generated:{campaign_id}:{run_key}"
+        )
         db.commit()
         
         logger.info(f"Generated {saved_count} leads for campaign {campaign.name}")
         
-        # Send email notification (optional)
-        try:
-            email_service = EmailService()
-            # Get admin users for notification
-            from app.models.user import User, UserRole
-            admin_users = db.query(User).filter(
-                User.role == UserRole.ADMIN,
-                User.is_active == True
-            ).all()
-            
-            admin_emails = [user.email for user in admin_users]
-            if admin_emails:
-                email_service.send_lead_notification(
-                    admin_emails, saved_count, campaign.name
-                )
-        except Exception as e:
-            logger.error(f"Failed to send email notification: {e}")
-        
         return {"campaign_id": campaign_id, "leads_generated": saved_count}
         
     except Exception as e:
         logger.error(f"Error generating leads for campaign {campaign_id}: {e}")
         db.rollback()
+        _end_failed_run(db, campaign_id)
         raise
     finally:
         db.close()
 
+def _schedule_next_occurrence(campaign: Campaign) -> bool:
+    """Move a recurring campaign to its next occurrence; False if there is none"""
+    if not campaign.is_recurring:
+        return False
+    now = datetime.utcnow()
+    next_run = next_run_at(campaign.scheduled_at or now, campaign.recurrence_pattern, now)
+    if not next_run:
+        return False
+    campaign.status = CampaignStatus.SCHEDULED
+    campaign.scheduled_at = next_run
+    campaign.dispatched_at = None
+    return True
+
+def _end_failed_run(db: Session, campaign_id: str):
+    """Take a campaign whose run failed out of the active state.
+
+    Recurring campaigns are scheduled for their next occurrence so one failure
+    does not end the chain; one-off campaigns are paused so they can be rerun.
+    """
+    try:
+        campaign = db.query(Campaign).filter(
+            Campaign.id == campaign_id,
+            Campaign.status == CampaignStatus.ACTIVE
+        ).first()
+        if campaign is None:
+            return
+        if not _schedule_next_occurrence(campaign):
+            campaign.status = CampaignStatus.PAUSED
+        db.commit()
+    except Exception as e:
+        logger.error(f"Could not reset campaign {campaign_id} after a failed run: {e}")
+        db.rollback()
+
+def _start_scheduled_run(db: Session, campaign_id: str, scheduled_for: str) -> bool:
+    """Atomically move a claimed campaign to active.
+    
+    Only succeeds while the campaign is still scheduled for the slot it was
+    dispatched for, so duplicate deliveries and rescheduled campaigns are no-ops.
+    """
+    result = db.execute(
+        update(Campaign)
+        .where(
+            Campaign.id == campaign_id,
+            Campaign.status == CampaignStatus.SCHEDULED,
+            Campaign.scheduled_at == datetime.fromisoformat(scheduled_for)
+        )
+        .values(status=CampaignStatus.ACTIVE)
+    )
+    db.commit()
+    return result.rowcount == 1
+
 @celery_app.task
 def run_scheduled_campaigns():
-    """Check for scheduled campaigns and run them"""
+    """Claim campaigns due before the next poll and dispatch them at their exact time"""
     db = SessionLocal()
     try:
-        # Find campaigns scheduled to run
+        # Look one poll interval ahead so ETAs cover the gap until the next run
         now = datetime.utcnow()
-        scheduled_campaigns = db.query(Campaign).filter(
-            Campaign.status == CampaignStatus.SCHEDULED,
-            Campaign.scheduled_at <= now
-        ).all()
+        horizon = now + timedelta(seconds=settings.scheduler_poll_seconds)
+        dispatched = 0
         
-        for campaign in scheduled_campaigns:
-            logger.info(f"Running scheduled campaign: {campaign.name}")
+        while True:
+            # Rows locked by a concurrent scheduler are skipped, never claimed twice
+            batch = db.query(Campaign).filter(
+                Campaign.status == CampaignStatus.SCHEDULED,
+                Campaign.scheduled_at <= horizon,
+                Campaign.dispatched_at.is_(None)
+            ).order_by(
+                Campaign.scheduled_at
+            ).limit(
+                settings.scheduler_claim_batch_size
+            ).with_for_update(skip_locked=True).all()
             
-            # Update status to active
-            campaign.status = CampaignStatus.ACTIVE
+            if not batch:
+                break
+            
+            for campaign in batch:
+                logger.info(f"Dispatching scheduled campaign {campaign.name} for {campaign.scheduled_at}")
+                campaign.dispatched_at = now
+                generate_leads_for_campaign.apply_async(
+                    args=[campaign.id],
+                    kwargs={"scheduled_for": campaign.scheduled_at.isoformat()},
+                    eta=max(campaign.scheduled_at, now)
+                )
+            
+            # Commit releases the row locks for this batch
             db.commit()
+            dispatched += len(batch)
             
-            # Start lead generation task
-            generate_leads_for_campaign.delay(campaign.id)
+            if len(batch) < settings.scheduler_claim_batch_size:
+                break
         
-        return {"scheduled_campaigns_run": len(scheduled_campaigns)}
+        return {"scheduled_campaigns_dispatched": dispatched}
         
     except Exception as e:
         logger.error(f"Error running scheduled campaigns: {e}")
+        db.rollback()
         raise
     finally:
         db.close()
 
+@celery_app.task
+def run_lead_export(job_id: str):
+    """Write a background lead export file"""
+    return run_export_job(job_id)
+
+@celery_app.task
+def maintain_activity_logs():
+    """Create upcoming activity log partitions and archive expired months"""
+    try:
+        summary = run_retention()
+    except Exception as e:
+        logger.error(f"Error maintaining activity logs: {e}")
+        raise
+    for archived in summary["archived"]:
+        logger.info(f"Archived {archived['rows']} activity logs from {archived['month']} to {archived['path']}")
+    return summary
+
+_outbox_sender = None
+
+@celery_app.task
+def drain_email_outbox():
+    """Send queued emails from the outbox"""
+    global _outbox_sender
+    # Kept per worker process so pooled SMTP connections survive between runs
+    if _outbox_sender is None:
+        _outbox_sender = OutboxSender()
+    try:
+        return _outbox_sender.drain(max_batches=settings.email_outbox_max_batches)
+    except Exception as e:
+        logger.error(f"Error draining email outbox: {e}")
+        raise
+
+ASSIGNMENT_DIGEST_HWM_KEY = "digest:lead_assignments:high_water_mark"
+
 @celery_app.task
 def send_lead_assignment_notifications():
-    """Send notifications for newly assigned leads"""
+    """Queue one digest per assignee for leads assigned since the last run"""
     db = SessionLocal()
     try:
         from app.models.lead import FinalLead
         from app.models.user import User
-        from datetime import timedelta
         
-        # Find leads assigned in the last hour
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        recent_assignments = db.query(FinalLead).filter(
+        # Resume from the high-water mark so no window is scanned twice
+        until = datetime.utcnow()
+        since = until - timedelta(seconds=settings.assignment_digest_interval_seconds)
+        redis_client = get_redis()
+        try:
+            high_water_mark = redis_client.get(ASSIGNMENT_DIGEST_HWM_KEY)
+            if high_water_mark:
+                since = datetime.fromisoformat(high_water_mark)
+        except RedisError as e:
+            logger.warning(f"Could not read assignment digest high-water mark: {e}")
+        
+        # Per-assignee counts in a single grouped query
+        counts = db.query(
+            FinalLead.assigned_to, func.count(FinalLead.id)
+        ).filter(
             FinalLead.assigned_to.isnot(None),
-            FinalLead.updated_at >= one_hour_ago
-        ).all()
+            FinalLead.updated_at > since,
+            FinalLead.updated_at <= until
+        ).group_by(FinalLead.assigned_to).all()
         
-        # Group by assigned user
-        assignments_by_user = {}
-        for lead in recent_assignments:
-            if lead.assigned_to not in assignments_by_user:
-                assignments_by_user[lead.assigned_to] = []
-            assignments_by_user[lead.assigned_to].append(lead)
+        # All assignees in one IN query
+        lead_counts = dict(counts)
+        users = db.query(User).filter(
+            User.id.in_(lead_counts.keys()),
+            User.is_active == True
+        ).all() if lead_counts else []
         
-        # Send notifications
+        # Queue the digests through the outbox, keyed by window start so a
+        # rerun after a failure to store the mark does not queue them twice
         email_service = EmailService()
-        notifications_sent = 0
+        notifications_queued = 0
+        for user in users:
+            subject, body = email_service.lead_assignment_content(user.full_name, lead_counts[user.id])
+            notifications_queued += EmailOutboxService.enqueue(
+                db, [user.email], subject, body,
+                dedup_key=f"lead_assignments:{user.id}:{since.isoformat()}"
+            )
+        db.commit()
         
-        for user_id, leads in assignments_by_user.items():
-            user = db.query(User).filter(User.id == user_id).first()
-            if user and user.email:
-                success = email_service.send_lead_assignment_notification(
-                    user.email, user.full_name, len(leads)
-                )
-                if success:
-                    notifications_sent += 1
+        # Only move the mark once the digests are safely queued
+        try:
+            redis_client.set(ASSIGNMENT_DIGEST_HWM_KEY, until.isoformat())
+        except RedisError as e:
+            logger.warning(f"Could not store assignment digest high-water mark: {e}")
         
-        return {"notifications_sent": notifications_sent}
+        return {"notifications_queued": notifications_queued}
         
     except Exception as e:
         logger.error(f"Error sending lead assignment notifications: {e}")
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.config import settings
+from app.models.user import User, UserRole
+from app.redis_client import get_redis
+
+# Every column but password_hash, which is loaded on access if a request needs it
+CACHED_COLUMNS = ["id", "email", "full_name", "role", "is_active", "created_at", "updated_at"]
+
+def _redis_key(user_id: str) -> str:
+    return f"auth:user:{user_id}"
+
+class _LRUCache:
+    """Thread-safe LRU of entries that expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class UserCache:
+    """Short-lived cache of active users for token resolution.
+
+    Entries live in a per-process LRU and, when `auth_user_cache_redis` is
+    set, in Redis so other workers share them. Writes in this process
+    invalidate both tiers; other processes see a change within
+    `auth_user_cache_ttl_seconds` at most.
+    """
+
+    def __init__(self):
+        self.local = _LRUCache(settings.auth_user_cache_size, settings.auth_user_cache_ttl_seconds)
+
+    def get(self, db: Session, user_id: str) -> Optional[User]:
+        """The active user with `user_id`, attached to `db`, from cache or database"""
+        values = self.local.get(user_id) or self._redis_get(user_id)
+        if values is not None:
+            self.local.set(user_id, values)
+            return self._attach(db, values)
+
+        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+        if user is not None:
+            values = {column: getattr(user, column) for column in CACHED_COLUMNS}
+            self.local.set(user_id, values)
+            self._redis_set(user_id, values)
+        return user
+
+    def invalidate(self, user_id: str):
+        self.local.delete(user_id)
+        if settings.auth_user_cache_redis:
+            try:
+                get_redis().delete(_redis_key(user_id))
+            except RedisError as e:
+                print(f"User cache invalidation error: {e}")
+
+    @staticmethod
+    def _attach(db: Session, values: Dict[str, Any]) -> User:
+        # Rebuild a detached instance and merge it without a SELECT
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def _redis_get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if not settings.auth_user_cache_redis:
+            return None
+        try:
+            raw = get_redis().get(_redis_key(user_id))
+        except RedisError:
+            return None
+        if raw is None:
+            return None
+        values = json.loads(raw)
+        values["role"] = UserRole(values["role"])
+        for column in ("created_at", "updated_at"):
+            if values[column] is not None:
+                values[column] = datetime.fromisoformat(values[column])
+        return values
+
+    def _redis_set(self, user_id: str, values: Dict[str, Any]):
+        if not settings.auth_user_cache_redis:
+            return
+        serialized = {
+            column: value.isoformat() if isinstance(value, datetime)
+            else value.value if isinstance(value, UserRole)
+            else value
+            for column, value in values.items()
+        }
+        try:
+            get_redis().setex(_redis_key(user_id), settings.auth_user_cache_ttl_seconds, json.dumps(serialized))
+        except RedisError:
+            pass
+
+user_cache = UserCache()
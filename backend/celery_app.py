@@ -27,6 +27,18 @@ celery_app.conf.update(
 celery_app.conf.beat_schedule = {
     'run-scheduled-campaigns': {
         'task': 'app.tasks.run_scheduled_campaigns',
-        'schedule': 300.0,  # Run every 5 minutes
+        'schedule': float(settings.scheduler_poll_seconds),  # Claims runs due before the next poll
+    },
+    'drain-email-outbox': {
+        'task': 'app.tasks.drain_email_outbox',
+        'schedule': float(settings.email_outbox_poll_seconds),
+    },
+    'send-lead-assignment-notifications': {
+        'task': 'app.tasks.send_lead_assignment_notifications',
+        'schedule': float(settings.assignment_digest_interval_seconds),
+    },
+    'maintain-activity-logs': {
+        'task': 'app.tasks.maintain_activity_logs',
+        'schedule': 24 * 60 * 60.0,  # Daily
     },
 }
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before it is imported
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
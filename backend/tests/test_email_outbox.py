@@ -0,0 +1,76 @@
+import smtplib
+import pytest
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.services import email_service
+from app.services.email_outbox import EmailOutboxService, OutboxSender
+
+class StubSMTP:
+    """Stands in for smtplib.SMTP, recording every message sent through it"""
+    sent = []
+    refused = set()
+
+    def __init__(self, host, port, timeout=None):
+        self.open = True
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if msg["To"] in self.refused:
+            raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"No such user")})
+        self.sent.append(msg)
+
+    def quit(self):
+        self.open = False
+
+    def close(self):
+        self.open = False
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(email_service.smtplib, "SMTP", StubSMTP)
+    monkeypatch.setattr(settings, "smtp_require_auth", False)
+    StubSMTP.sent = []
+    StubSMTP.refused = set()
+    EmailOutbox.__table__.create(engine, checkfirst=True)
+    session = SessionLocal()
+    yield session
+    session.close()
+    EmailOutbox.__table__.drop(engine)
+
+def test_enqueue_skips_recipients_already_queued_for_the_key(db):
+    assert EmailOutboxService.enqueue(db, ["a@example.com", "b@example.com"], "Hi", "Body", dedup_key="k") == 2
+    db.commit()
+
+    assert EmailOutboxService.enqueue(db, ["b@example.com", "c@example.com", "c@example.com"], "Hi", "Body", dedup_key="k") == 1
+    db.commit()
+
+    recipients = sorted(recipient for (recipient,) in db.query(EmailOutbox.recipient))
+    assert recipients == ["a@example.com", "b@example.com", "c@example.com"]
+
+def test_drain_sends_due_emails_and_retries_refused_recipients(db):
+    EmailOutboxService.enqueue(db, ["a@example.com", "b@example.com"], "Hi", "Body")
+    db.commit()
+    StubSMTP.refused = {"b@example.com"}
+
+    sender = OutboxSender(pool_size=2)
+    try:
+        totals = sender.drain()
+    finally:
+        sender.close()
+
+    assert totals == {"sent": 1, "retried": 1, "failed": 0}
+    assert [msg["To"] for msg in StubSMTP.sent] == ["a@example.com"]
+    rows = {row.recipient: row for row in db.query(EmailOutbox)}
+    assert rows["a@example.com"].status == OutboxStatus.SENT
+    assert rows["b@example.com"].status == OutboxStatus.PENDING
+    assert rows["b@example.com"].attempts == 1
+    assert "No such user" in rows["b@example.com"].last_error